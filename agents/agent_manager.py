@@ -1,7 +1,13 @@
 import os
+import re
+from types import MappingProxyType
 from utils.file_ops import file_exists, read_file
 from utils.logger import logger
 
+# Failure indicators in TEST_REPORT.md, matched in a single pass
+# ("FAILED" is covered by "FAIL")
+_FAIL_RE = re.compile(r"FAIL|Error|ERROR|Exception")
+
 class AgentManager:
     """
     CEO/Controller for the multi-agent system.
@@ -9,6 +15,64 @@ class AgentManager:
     NO AI CALLS - Pure decision logic based on project state.
     """
     
+    # Reasoning reported for each decision (Tester is overridden when re-testing)
+    _REASONING = MappingProxyType({
+        "LanguageSelector": "Language configuration is missing.",
+        "Planner": "Implementation plan (PLAN.md) is missing.",
+        "FrontendCoder": "Plan complete, starting frontend development.",
+        "BackendCoder": "Frontend complete, moving to backend.",
+        "TerminalAgent": "Code complete, installing dependencies.",
+        "Tester": "Test report is missing.",
+        "Debugger": "Tests failed, triggering debugger.",
+        "DocumentationAgent": "Project documentation is missing.",
+        "GitAgent": "Initializing version control for generated project.",
+        "FINISHED": "All steps complete."
+    })
+    
+    # Fixed progression once the plan exists: last agent → next agent
+    _TRANSITIONS = MappingProxyType({
+        "Planner": "FrontendCoder",
+        "FrontendCoder": "BackendCoder",
+        "BackendCoder": "TerminalAgent",
+    })
+    
+    # Agents that can run concurrently when the first is scheduled (parallel mode);
+    # the last one becomes last_action, so the progression continues after it
+    _PARALLEL_GROUPS = MappingProxyType({
+        "FrontendCoder": ("FrontendCoder", "BackendCoder"),
+    })
+    
+    # Files that, once observed, stay in place for the rest of the run
+    _STICKY_FILES = ("PLAN.md", "README.md")
+    
+    # What each agent can create among the checked names. A cached miss is
+    # dropped once its producer has run; agents not listed here may write
+    # anything, so they drop every cached miss for the project.
+    _PRODUCES = MappingProxyType({
+        "LanguageSelector": (),
+        "Planner": ("PLAN.md",),
+        "Tester": ("TEST_REPORT.md",),
+        "DocumentationAgent": ("README.md",),
+        "GitAgent": (".git",),
+    })
+    
+    def __init__(self, parallel: bool = False):
+        """
+        Initialize the AgentManager.
+        
+        Args:
+            parallel: Schedule independent agents together via "next_agents"
+        """
+        self.parallel = parallel
+        # Prerequisites already satisfied, per project path
+        self._state = {}
+        # Names known to be missing, per project path (see _PRODUCES)
+        self._missing = {}
+        # Directory snapshot for the current decision (scanned lazily)
+        self._snapshot = None
+        # ((project_path, st_mtime_ns, st_size), failed) for the last TEST_REPORT.md read
+        self._test_report_cache = None
+    
     def decide_next_agent(self, context: dict) -> dict:
         """
         Decides the next agent to run based on the project state.
@@ -20,12 +84,17 @@ class AgentManager:
                 - project_path (str, optional): Project directory path
                 
         Returns:
-            dict: {"next_agent": str, "reasoning": str}
+            dict: {"next_agent": str, "reasoning": str[, "next_agents": list]}
                 - next_agent: Name of agent to run next or "FINISHED"
                 - reasoning: Brief explanation of the decision
+                - next_agents: In parallel mode, all agents to run concurrently
         """
         last_action = context.get("last_action")
         project_path = context.get("project_path", "")
+        # At most one directory scan per decision, and only if a check needs it
+        self._snapshot = None
+        tests_failed = False
+        self._forget_misses(project_path, last_action)
         
         logger.info(f"AgentManager: Deciding next agent (last_action={last_action})")
         
@@ -39,20 +108,10 @@ class AgentManager:
             logger.info("AgentManager: No PLAN.md → Planner")
             next_agent = "Planner"
         
-        # 3. Frontend (state-based progression)
-        elif last_action == "Planner":
-            logger.info("AgentManager: After Planner → FrontendCoder")
-            next_agent = "FrontendCoder"
-        
-        # 4. Backend (state-based progression)
-        elif last_action == "FrontendCoder":
-            logger.info("AgentManager: After FrontendCoder → BackendCoder")
-            next_agent = "BackendCoder"
-        
-        # 5. Dependencies (state-based progression)
-        elif last_action == "BackendCoder":
-            logger.info("AgentManager: After BackendCoder → TerminalAgent")
-            next_agent = "TerminalAgent"
+        # 3-5. Frontend → Backend → Dependencies (state-based progression)
+        elif last_action in self._TRANSITIONS:
+            next_agent = self._TRANSITIONS[last_action]
+            logger.info(f"AgentManager: After {last_action} → {next_agent}")
         
         # 6. Testing
         elif not self._check_file_exists(project_path, "TEST_REPORT.md"):
@@ -61,6 +120,7 @@ class AgentManager:
         
         # 7. Debugging (if tests failed)
         elif self._tests_failed(project_path):
+            tests_failed = True
             if last_action == "Debugger":
                 # Re-run tests after debugging
                 logger.info("AgentManager: After Debugger → Tester (retest)")
@@ -95,25 +155,66 @@ class AgentManager:
             }
         
         # Map to reasoning
-        reasoning_map = {
-            "LanguageSelector": "Language configuration is missing.",
-            "Planner": "Implementation plan (PLAN.md) is missing.",
-            "FrontendCoder": "Plan complete, starting frontend development.",
-            "BackendCoder": "Frontend complete, moving to backend.",
-            "TerminalAgent": "Code complete, installing dependencies.",
-            "Tester": "Test report is missing." if not self._tests_failed(project_path) else "Debugging applied, re-running tests.",
-            "Debugger": "Tests failed, triggering debugger.",
-            "DocumentationAgent": "Project documentation is missing.",
-            "GitAgent": "Initializing version control for generated project.",
-            "FINISHED": "All steps complete."
-        }
+        reasoning = self._REASONING.get(next_agent, "Proceeding to next step.")
+        if next_agent == "Tester" and tests_failed:
+            reasoning = "Debugging applied, re-running tests."
         
-        return {
+        decision = {
             "next_agent": next_agent,
-            "reasoning": reasoning_map.get(next_agent, "Proceeding to next step.")
+            "reasoning": reasoning
         }
+        if self.parallel and next_agent in self._PARALLEL_GROUPS:
+            decision["next_agents"] = list(self._PARALLEL_GROUPS[next_agent])
+        return decision
 
-
+    
+    def _forget_misses(self, project_path: str, last_action) -> None:
+        """
+        Helper: Drop cached misses that the last agent may have created.
+        
+        Args:
+            project_path: Path to project directory
+            last_action: Name of last agent that ran (None at start)
+        """
+        missing = self._missing.get(project_path)
+        if not missing or last_action is None:
+            return
+        if last_action in self._PRODUCES:
+            missing.difference_update(self._PRODUCES[last_action])
+        else:
+            missing.clear()
+    
+    def _get_snapshot(self, project_path: str) -> dict:
+        """
+        Helper: Return the directory snapshot for the current decision,
+        scanning the project directory on first use.
+        
+        Args:
+            project_path: Path to project directory
+            
+        Returns:
+            dict: {name: is_dir} for every entry in the project directory
+        """
+        if self._snapshot is None:
+            self._snapshot = self._scan_project(project_path)
+        return self._snapshot
+    
+    def _scan_project(self, project_path: str) -> dict:
+        """
+        Helper: Scan the project directory once.
+        
+        Args:
+            project_path: Path to project directory
+            
+        Returns:
+            dict: {name: is_dir} for every entry in the project directory
+        """
+        try:
+            with os.scandir(project_path) as entries:
+                return {entry.name: entry.is_dir() for entry in entries}
+        except OSError as e:
+            logger.warning(f"AgentManager: Could not scan project directory: {e}")
+            return {}
     
     def _check_file_exists(self, project_path: str, filename: str) -> bool:
         """
@@ -130,12 +231,23 @@ class AgentManager:
         if not project_path:
             return False
         
-        # Since main.py changes CWD to project_path, we should check for the file 
-        # in the current directory.
-        # If we use os.path.join(project_path, filename), it creates a nested path
-        # relative to CWD (e.g. project/app/project/app/PLAN.md).
+        satisfied = self._state.setdefault(project_path, set())
+        if filename in satisfied:
+            return True
         
-        return os.path.exists(filename)
+        # Known miss: nothing that could create it has run since
+        missing = self._missing.setdefault(project_path, set())
+        if filename in missing:
+            return False
+        
+        # Only regular files count; the snapshot maps name → is_dir
+        snapshot = self._get_snapshot(project_path)
+        exists = filename in snapshot and not snapshot[filename]
+        if exists and filename in self._STICKY_FILES:
+            satisfied.add(filename)
+        elif not exists:
+            missing.add(filename)
+        return exists
     
     def _tests_failed(self, project_path: str) -> bool:
         """
@@ -151,12 +263,20 @@ class AgentManager:
             return False
         
         try:
-            # We are already in the project directory, so just use the filename
-            full_path = "TEST_REPORT.md"
+            full_path = os.path.join(project_path, "TEST_REPORT.md")
+            
+            # The report only changes when the Tester runs, so re-read it
+            # only when its modification time or size changes
+            st = os.stat(full_path)
+            key = (project_path, st.st_mtime_ns, st.st_size)
+            if self._test_report_cache and self._test_report_cache[0] == key:
+                return self._test_report_cache[1]
+            
             report_content = read_file(full_path)
             # Simple keyword check for failure indicators
-            failure_keywords = ["FAIL", "FAILED", "Error", "ERROR", "Exception"]
-            return any(keyword in report_content for keyword in failure_keywords)
+            failed = bool(_FAIL_RE.search(report_content))
+            self._test_report_cache = (key, failed)
+            return failed
         except Exception as e:
             logger.warning(f"AgentManager: Could not read TEST_REPORT.md: {e}")
             return False
@@ -174,5 +294,20 @@ class AgentManager:
         if not project_path:
             return False
         
-        # Check for .git directory (we're in the project directory)
-        return os.path.exists(".git") and os.path.isdir(".git")
+        # .git only appears once GitAgent has run and then persists,
+        # so remember a positive result for the rest of the run
+        satisfied = self._state.setdefault(project_path, set())
+        if ".git" in satisfied:
+            return True
+        
+        missing = self._missing.setdefault(project_path, set())
+        if ".git" in missing:
+            return False
+        
+        # Check for .git directory
+        initialized = self._get_snapshot(project_path).get(".git", False)
+        if initialized:
+            satisfied.add(".git")
+        else:
+            missing.add(".git")
+        return initialized
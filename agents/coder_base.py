@@ -0,0 +1,225 @@
+import os
+import re
+from hashlib import blake2b
+from concurrent.futures import ThreadPoolExecutor
+from utils.gemini_client import generate_stream_with_retry
+from utils.logger import logger
+from utils.file_ops import write_file
+
+# Matches: Filename: index.html \n ```html \n <code> \n ```
+_FILE_BLOCK_RE = re.compile(r"Filename:\s*(.+?)\s*\n```\w*\n(.*?)```", re.DOTALL)
+
+# Placeholder markers checked by _is_valid_code
+_PLACEHOLDER_RES = [
+    re.compile(r"//\s*\.\.\."),  # // ...
+    re.compile(r"#\s*\.\.\."),   # # ...
+]
+
+# Content that is nothing but a single comment, checked with fullmatch.
+# The tempered (?:(?!end).)* body can't run past the first closing marker,
+# so matching stays linear even on output full of comment fragments.
+_COMMENT_ONLY_RES = [
+    re.compile(r"\s*/\*(?:(?!\*/).)*\*/\s*", re.DOTALL),   # Only /* comment */
+    re.compile(r"\s*<!--(?:(?!-->).)*-->\s*", re.DOTALL),   # Only <!-- comment -->
+]
+
+# Common placeholder comments, folded into one alternation so the code is scanned once
+_PLACEHOLDER_KEYWORDS_RE = re.compile(
+    "|".join(re.escape(keyword) for keyword in [
+        "rest of code",
+        "implementation",
+        "add your code here",
+        "placeholder",
+        "todo",
+    ]),
+    re.IGNORECASE,
+)
+
+# Deletes whitespace in one C-level pass when counting real content
+_WS_TABLE = str.maketrans("", "", " \n\t\r\f\v")
+
+# Shared by every coder: writes to distinct paths are independent I/O
+_WRITE_POOL = ThreadPoolExecutor(max_workers=8)
+
+# Content digests of files this process has seen, keyed by absolute path and
+# validated against (st_mtime_ns, st_size). Module level so every coder
+# shares it.
+_DIGESTS = {}
+
+def _digest(data: bytes) -> bytes:
+    return blake2b(data, digest_size=16).digest()
+
+class _BlockWriter:
+    """
+    Collects a (possibly streamed) response and queues each file write on
+    _WRITE_POOL as soon as its Filename block is complete.
+    """
+    
+    def __init__(self, coder, project_path: str = ""):
+        self.coder = coder
+        self.project_path = project_path
+        self.text = ""
+        self.pos = 0          # End of the last complete block
+        self.blocks = {}      # filename -> code of its last block
+        self.writes = {}      # filename -> (Future, length of code written)
+    
+    def feed(self, chunk: str) -> None:
+        """Add response text and start writes for blocks it completes."""
+        self.text += chunk
+        for match in _FILE_BLOCK_RE.finditer(self.text, self.pos):
+            self.pos = match.end()
+            filename, code = match.group(1).strip(), match.group(2).strip()
+            self.blocks[filename] = code
+            
+            # Validation: Skip content that is a placeholder
+            if not self.coder._is_valid_code(code, filename):
+                continue
+            
+            # Later blocks for the same path replace earlier ones (last write wins)
+            previous = self.writes.get(filename)
+            if previous is not None:
+                previous[0].result()
+            path = os.path.join(self.project_path, filename)
+            future = _WRITE_POOL.submit(self.coder._write_if_changed, path, code)
+            self.writes[filename] = (future, len(code))
+    
+    def finish(self) -> list:
+        """Wait for queued writes and return the files that were written."""
+        name = self.coder.NAME
+        skipped = [filename for filename in self.blocks if filename not in self.writes]
+        if skipped:
+            logger.warning(f"{name}: Skipping {skipped} - appears to be placeholder/comment-only")
+        
+        files = []
+        written = []
+        for filename, (future, length) in self.writes.items():
+            if future.result():
+                files.append(filename)
+                written.append((filename, length))
+            else:
+                logger.error(f"{name}: Failed to write {filename}")
+        
+        # One summary line; %-style args are only formatted if INFO is enabled
+        logger.info("%s: Wrote %d files: %s", name, len(written), written)
+        
+        return files
+
+class CoderBase:
+    """
+    Shared implementation for the code-generating agents.
+    Subclasses set NAME, KIND and PROMPT_FN.
+    """
+    
+    NAME = "Coder"
+    KIND = "application"
+    PROMPT_FN = None
+    
+    def run(self, task: str, project_path: str, context: dict, steps: list = None) -> dict:
+        """
+        Generates code based on task and context.
+        Writes generated files under project_path.
+        Plan steps, when given, are batched into the one prompt.
+        The response is streamed; files are written as their blocks complete.
+        
+        Returns:
+            dict: {"success": bool, "output": {"files": list}, "error": str/None}
+        """
+        prompt = self.PROMPT_FN(task, context, steps)
+        try:
+            logger.info(f"{self.NAME}: Generating {self.KIND} code")
+            writer = _BlockWriter(self, project_path)
+            for chunk in generate_stream_with_retry(prompt, temperature=0.3):
+                writer.feed(chunk)
+            files_created = writer.finish()
+            
+            if not files_created:
+                logger.warning(f"{self.NAME}: No files were created from the response")
+            
+            logger.info(f"{self.NAME}: Created {len(files_created)} files: {files_created}")
+            return {"success": True, "output": {"files": files_created}, "error": None}
+        except Exception as e:
+            logger.error(f"{self.NAME} error: {e}")
+            return {"success": False, "output": {}, "error": str(e)}
+
+    def _parse_and_save_files(self, response: str, project_path: str = "") -> list:
+        """
+        Parses response for 'Filename: <name>' and code blocks, then writes files
+        under project_path. Validates content before writing to avoid placeholders.
+        Returns the filenames as given in the response (relative to project_path).
+        """
+        writer = _BlockWriter(self, project_path)
+        writer.feed(response)
+        return writer.finish()
+    
+    def _write_if_changed(self, filename: str, code: str) -> bool:
+        """
+        Writes code to filename unless the file already holds identical bytes.
+        Returns True if the file is up to date afterwards.
+        """
+        data = code.encode("utf-8")
+        digest = _digest(data)
+        path = os.path.abspath(filename)
+        
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        
+        # A size mismatch means the content differs, no need to hash
+        if st is not None and st.st_size == len(data):
+            key = (st.st_mtime_ns, st.st_size)
+            cached = _DIGESTS.get(path)
+            if cached and cached[0] == key:
+                existing = cached[1]
+            else:
+                try:
+                    with open(path, "rb") as f:
+                        existing = _digest(f.read())
+                    _DIGESTS[path] = (key, existing)
+                except OSError:
+                    existing = None
+            if existing == digest:
+                logger.debug(f"{self.NAME}: {filename} unchanged, skipping write")
+                return True
+        
+        if not write_file(filename, code):
+            return False
+        try:
+            st = os.stat(path)
+            _DIGESTS[path] = ((st.st_mtime_ns, st.st_size), digest)
+        except OSError:
+            _DIGESTS.pop(path, None)
+        return True
+    
+    def _is_valid_code(self, code: str, filename: str) -> bool:
+        """
+        Validates if code is real implementation or just placeholder.
+        Returns False if it appears to be placeholder/comment-only.
+        """
+        # Check 1: Minimum length (too short = likely placeholder)
+        if len(code) < 50:
+            return False
+        
+        # Check 2: Reject content that is a single comment and nothing else
+        if any(pattern.fullmatch(code) for pattern in _COMMENT_ONLY_RES):
+            return False
+        
+        # Check 3: Look for placeholder patterns
+        for pattern in _PLACEHOLDER_RES:
+            # Measure what is left once the matches are removed, using the
+            # match spans instead of a second re.sub pass over the code
+            removed = sum(m.end() - m.start() for m in pattern.finditer(code))
+            if removed and len(code) - removed < 20:
+                # Entire content is placeholder, reject
+                return False
+        
+        # Check 4: Check for common placeholder comments
+        # If code is mostly just these keywords, it's likely placeholder
+        if _PLACEHOLDER_KEYWORDS_RE.search(code):
+            # Count non-whitespace characters
+            non_ws = len(code.translate(_WS_TABLE))
+            if non_ws < 100:  # Very short with placeholder keywords = bad
+                return False
+        
+        return True
+
@@ -4,12 +4,132 @@ Uses MCP github server when available, falls back to native git subprocess.
 """
 
 import os
+import shlex
 import logging
+import threading
 import subprocess
-from typing import Dict, Any, Optional
+from typing import Dict, Any
 
 logger = logging.getLogger('MultiAgentBuilder')
 
+# Shared by every git subprocess call
+_SUBPROCESS_KWARGS = {'capture_output': True, 'text': True, 'timeout': 30}
+
+# Merged over os.environ per call (so later env changes still apply):
+# no optional index.lock work, never block on a credential prompt, and
+# untranslated messages so output such as "nothing to commit" can be matched
+_GIT_ENV = {'GIT_OPTIONAL_LOCKS': '0', 'GIT_TERMINAL_PROMPT': '0', 'LC_ALL': 'C'}
+
+
+def _git_env() -> dict:
+    """Environment for git subprocesses."""
+    return {**os.environ, **_GIT_ENV}
+
+# .gitignore contents per backend language, built once at import
+_GITIGNORE_TEMPLATES = {
+    'python': """# Python
+__pycache__/
+*.py[cod]
+*$py.class
+*.so
+.Python
+venv/
+env/
+ENV/
+.venv
+*.egg-info/
+dist/
+build/
+.pytest_cache/
+.coverage
+htmlcov/
+
+# IDE
+.vscode/
+.idea/
+*.swp
+*.swo
+*.swn
+.DS_Store
+
+# Logs
+*.log
+builder.log
+
+# Environment
+.env
+.env.local
+""",
+    'javascript': """# Node
+node_modules/
+npm-debug.log*
+yarn-debug.log*
+yarn-error.log*
+pnpm-debug.log*
+lerna-debug.log*
+.pnpm-store/
+
+# Build
+dist/
+dist-ssr/
+*.local
+
+# IDE
+.vscode/
+.idea/
+*.swp
+.DS_Store
+
+# Environment
+.env
+.env.local
+.env.*.local
+
+# Logs
+*.log
+""",
+    'java': """# Java
+*.class
+*.jar
+*.war
+*.ear
+target/
+.gradle/
+build/
+
+# IDE
+.idea/
+*.iml
+.vscode/
+.DS_Store
+
+# Logs
+*.log
+""",
+    'go': """# Go
+*.exe
+*.exe~
+*.dll
+*.so
+*.dylib
+*.test
+*.out
+vendor/
+go.work
+
+# IDE
+.idea/
+.vscode/
+.DS_Store
+
+# Logs
+*.log
+""",
+}
+
+# Encoded once; .gitignore is written as raw bytes
+_GITIGNORE_BYTES = {language: content.encode('utf-8') for language, content in _GITIGNORE_TEMPLATES.items()}
+
 
 class GitAgent:
     """
@@ -25,6 +145,10 @@ class GitAgent:
             mcp_client: Optional MCP client for github operations
         """
         self.mcp = mcp_client
+        # Absolute .gitignore paths this agent created or found, so later
+        # runs on the same project skip the open()
+        self._gitignore_done = set()
+        self._gitignore_lock = threading.Lock()
         
     def run(self, task: str, project_path: str, context: dict) -> Dict[str, Any]:
         """
@@ -45,7 +169,10 @@ class GitAgent:
             git_dir = os.path.join(project_path, '.git')
             is_initialized = os.path.exists(git_dir)
             
-            if not is_initialized:
+            # On POSIX, init/add/commit run as one shell invocation
+            batched = os.name == 'posix'
+            
+            if not is_initialized and not batched:
                 # Initialize repository
                 init_result = self._init_repository(project_path, context)
                 if not init_result["success"]:
@@ -56,6 +183,9 @@ class GitAgent:
             if not gitignore_result["success"]:
                 logger.warning(f".gitignore creation failed: {gitignore_result['error']}")
             
+            if batched:
+                return self._init_and_commit(project_path, context, init=not is_initialized)
+            
             # Commit all files
             commit_result = self._commit_all(project_path, context)
             
@@ -83,9 +213,8 @@ class GitAgent:
             result = subprocess.run(
                 ['git', 'init'],
                 cwd=project_path,
-                capture_output=True,
-                text=True,
-                timeout=30
+                env=_git_env(),
+                **_SUBPROCESS_KWARGS
             )
             
             if result.returncode != 0:
@@ -118,22 +247,33 @@ class GitAgent:
     def _create_gitignore(self, project_path: str, context: dict) -> Dict[str, Any]:
         """Create .gitignore file based on project language."""
         try:
-            gitignore_path = os.path.join(project_path, '.gitignore')
+            gitignore_path = os.path.abspath(os.path.join(project_path, '.gitignore'))
             
-            # Skip if .gitignore already exists
-            if os.path.exists(gitignore_path):
-                logger.debug(".gitignore already exists, skipping")
-                return {"success": True, "output": {}, "error": None}
+            # Already created or seen on an earlier run, no syscall needed
+            with self._gitignore_lock:
+                if gitignore_path in self._gitignore_done:
+                    return {"success": True, "output": {}, "error": None}
             
             # Get language-specific .gitignore template
             language_config = context.get('language_config', {})
             backend_lang = language_config.get('backend', {}).get('language', 'python').lower()
             
-            gitignore_content = self._get_gitignore_template(backend_lang)
+            gitignore_content = _GITIGNORE_BYTES.get(backend_lang, _GITIGNORE_BYTES['python'])
+            
+            # O_EXCL makes creation and the existence check one open() call
+            try:
+                fd = os.open(gitignore_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                logger.debug(".gitignore already exists, skipping")
+                with self._gitignore_lock:
+                    self._gitignore_done.add(gitignore_path)
+                return {"success": True, "output": {}, "error": None}
             
             # Write .gitignore
-            with open(gitignore_path, 'w', encoding='utf-8') as f:
+            with os.fdopen(fd, 'wb') as f:
                 f.write(gitignore_content)
+            with self._gitignore_lock:
+                self._gitignore_done.add(gitignore_path)
             
             logger.info("✓ .gitignore created")
             return {"success": True, "output": {"gitignore_created": True}, "error": None}
@@ -146,111 +286,86 @@ class GitAgent:
                 "error": str(e)
             }
     
-    def _get_gitignore_template(self, language: str) -> str:
-        """Get .gitignore template for the given language."""
-        templates = {
-            'python': """# Python
-__pycache__/
-*.py[cod]
-*$py.class
-*.so
-.Python
-venv/
-env/
-ENV/
-.venv
-*.egg-info/
-dist/
-build/
-.pytest_cache/
-.coverage
-htmlcov/
-
-# IDE
-.vscode/
-.idea/
-*.swp
-*.swo
-*.swn
-.DS_Store
-
-# Logs
-*.log
-builder.log
-
-# Environment
-.env
-.env.local
-""",
-            'javascript': """# Node
-node_modules/
-npm-debug.log*
-yarn-debug.log*
-yarn-error.log*
-pnpm-debug.log*
-lerna-debug.log*
-.pnpm-store/
-
-# Build
-dist/
-dist-ssr/
-*.local
-
-# IDE
-.vscode/
-.idea/
-*.swp
-.DS_Store
-
-# Environment
-.env
-.env.local
-.env.*.local
-
-# Logs
-*.log
-""",
-            'java': """# Java
-*.class
-*.jar
-*.war
-*.ear
-target/
-.gradle/
-build/
-
-# IDE
-.idea/
-*.iml
-.vscode/
-.DS_Store
-
-# Logs
-*.log
-""",
-            'go': """# Go
-*.exe
-*.exe~
-*.dll
-*.so
-*.dylib
-*.test
-*.out
-vendor/
-go.work
-
-# IDE
-.idea/
-.vscode/
-.DS_Store
-
-# Logs
-*.log
-""",
-        }
-        
-        # Default to Python template if language not found
-        return templates.get(language, templates['python'])
+    def _init_and_commit(self, project_path: str, context: dict, init: bool) -> Dict[str, Any]:
+        """
+        Initialize (if needed), stage and commit in a single shell call.
+        Each git step costs a process launch, so chaining them saves
+        three fork/execs over the step-by-step path.
+        """
+        try:
+            project_name = context.get('project_name', 'app')
+            commit_message = f"Generated project: {project_name}"
+            
+            if self.mcp and self.mcp.is_available('github'):
+                logger.info("Committing via MCP github")
+                # MCP github commit would go here
+                # For now, fallthrough to native
+                pass
+            
+            # Only `git commit` writes to stdout (-q elsewhere), and it is
+            # skipped when nothing is staged. -A stages every agent's output
+            # (plan, lockfiles, Debugger rewrites, README), not just the coders'
+            script = "git add -A && { git diff --cached --quiet || git commit -m %s; }" % shlex.quote(commit_message)
+            if init:
+                script = "git init -q && " + script
+            
+            logger.info("Committing via native git (batched)")
+            result = subprocess.run(
+                script,
+                shell=True,
+                cwd=project_path,
+                env=_git_env(),
+                **{**_SUBPROCESS_KWARGS, 'timeout': 60}
+            )
+            
+            if result.returncode == 127:
+                return {
+                    "success": False,
+                    "output": {},
+                    "error": "git command not found. Please install Git."
+                }
+            
+            if result.returncode != 0:
+                return {
+                    "success": False,
+                    "output": {},
+                    "error": f"git init/add/commit failed: {result.stderr}"
+                }
+            
+            if init:
+                logger.info("✓ Git repository initialized")
+            
+            if not result.stdout.strip():
+                logger.info("No changes to commit")
+                return {
+                    "success": True,
+                    "output": {"committed": False, "message": "No changes"},
+                    "error": None
+                }
+            
+            logger.info(f"✓ Committed: {commit_message}")
+            return {
+                "success": True,
+                "output": {
+                    "committed": True,
+                    "message": commit_message
+                },
+                "error": None
+            }
+            
+        except FileNotFoundError:
+            return {
+                "success": False,
+                "output": {},
+                "error": "git command not found. Please install Git."
+            }
+        except Exception as e:
+            logger.error(f"Failed to commit: {e}")
+            return {
+                "success": False,
+                "output": {},
+                "error": str(e)
+            }
     
     def _commit_all(self, project_path: str, context: dict) -> Dict[str, Any]:
         """Commit all files in the project."""
@@ -267,13 +382,12 @@ go.work
             # Native git commit
             logger.info("Committing via native git")
             
-            # Add all files
+            # Add all files, including every agent's output and deletions
             add_result = subprocess.run(
-                ['git', 'add', '.'],
+                ['git', 'add', '-A'],
                 cwd=project_path,
-                capture_output=True,
-                text=True,
-                timeout=30
+                env=_git_env(),
+                **_SUBPROCESS_KWARGS
             )
             
             if add_result.returncode != 0:
@@ -283,16 +397,15 @@ go.work
                     "error": f"git add failed: {add_result.stderr}"
                 }
             
-            # Check if there are changes to commit
-            status_result = subprocess.run(
-                ['git', 'status', '--porcelain'],
+            # Commit; git reports an empty index itself, so no status probe
+            commit_result = subprocess.run(
+                ['git', 'commit', '-m', commit_message],
                 cwd=project_path,
-                capture_output=True,
-                text=True,
-                timeout=30
+                env=_git_env(),
+                **_SUBPROCESS_KWARGS
             )
             
-            if not status_result.stdout.strip():
+            if commit_result.returncode == 1 and "nothing to commit" in commit_result.stdout + commit_result.stderr:
                 logger.info("No changes to commit")
                 return {
                     "success": True,
@@ -300,15 +413,6 @@ go.work
                     "error": None
                 }
             
-            # Commit
-            commit_result = subprocess.run(
-                ['git', 'commit', '-m', commit_message],
-                cwd=project_path,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
             if commit_result.returncode != 0:
                 return {
                     "success": False,
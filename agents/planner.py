@@ -2,14 +2,64 @@ import os
 import json
 import re
 
-from utils.gemini_client import generate_with_retry
+# orjson parses LLM output several times faster; stdlib json is the fallback
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+from utils.gemini_client import generate_stream_with_retry, take_json_object
 from prompts.templates import PromptTemplates
 from utils.logger import logger
-from utils.file_ops import write_file
+from utils.file_ops import write_file_async
+
+# Control characters that break json.loads on LLM output
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x1f\x7f-\x9f]')
+
+
+# PLAN.md skeleton, filled by Planner._build_plan_markdown
+_PLAN_TEMPLATE = """# Architecture Plan
+
+## 1. Overview
+{overview}
+
+## 2. File Structure
+```
+{file_structure}
+```
+
+## 3. Frontend Architecture
+{frontend_architecture}
+
+## 4. Backend Architecture
+{backend_architecture}
+
+## 5. API Endpoints
+{api_endpoints}
+
+## 6. Dependencies
+{deps_str}
+
+## 7. Build Commands
+```bash
+{build_str}
+```
+"""
 
 
 class Planner:
     """Creates detailed implementation plan for the project."""
+    
+    # Fallbacks for sections missing from the parsed plan
+    _DEFAULTS = {
+        "file_structure": "File structure to be determined",
+        "frontend_architecture": "Frontend architecture to be designed",
+        "backend_architecture": "Backend architecture to be designed",
+        "api_endpoints": "API endpoints to be defined",
+        "dependencies": [],
+        "build_commands": [],
+    }
 
     def run(self, task: str, project_path: str, context: dict) -> dict:
         """
@@ -17,14 +67,16 @@ class Planner:
         Robust against malformed JSON responses.
 
         Returns:
-            dict: {"success": bool, "output": dict, "error": str | None}
+            dict: {"success": bool, "output": dict, "error": str | None,
+                   "pending_writes": list of Futures for the PLAN.md write}
         """
         language_config = context.get("language_config", {})
         prompt = PromptTemplates.planner(task, language_config)
 
         try:
             logger.info("Planner: Creating implementation plan")
-            response = generate_with_retry(prompt, temperature=0.4)
+            # Stop reading once the plan object closes; trailing prose isn't needed
+            response = take_json_object(generate_stream_with_retry(prompt, temperature=0.4))
             
             # Try to extract structured data
             plan_data = self._extract_plan_data(response, task)
@@ -35,13 +87,12 @@ class Planner:
             # Build PLAN.md
             plan_md = self._build_plan_markdown(plan_data, task)
             
-            # Write to current directory
-            plan_path = "PLAN.md"
-            ok = write_file(plan_path, plan_md)
-            if not ok:
-                raise RuntimeError("Failed to write PLAN.md")
+            # Write in the background; the builder waits on pending_writes
+            # before the next decision reads PLAN.md
+            plan_path = os.path.join(project_path, "PLAN.md")
+            pending = write_file_async(plan_path, plan_md)
 
-            return {"success": True, "output": plan_data, "error": None}
+            return {"success": True, "output": plan_data, "error": None, "pending_writes": [pending]}
 
         except Exception as e:
             logger.error(f"Planner error: {e}")
@@ -51,7 +102,19 @@ class Planner:
         """
         Extract plan data from response with robust error handling.
         """
-        # Try JSON extraction first
+        # Fast path: the outermost braces already skip any code fences
+        start_idx = response.find('{')
+        end_idx = response.rfind('}')
+        if start_idx != -1 and end_idx > start_idx:
+            try:
+                parsed = _json_loads(response[start_idx:end_idx + 1])
+                if isinstance(parsed, dict):
+                    logger.info("Successfully parsed JSON response")
+                    return parsed
+            except ValueError:
+                pass
+        
+        # Slow path: strip fences and control characters, then retry
         try:
             # Remove markdown code blocks
             cleaned = response.replace("```json", "").replace("```", "").strip()
@@ -63,8 +126,8 @@ class Planner:
             if start_idx != -1 and end_idx != -1:
                 json_str = cleaned[start_idx:end_idx + 1]
                 # Clean control characters
-                json_str = re.sub(r'[\x00-\x1f\x7f-\x9f]', ' ', json_str)
-                parsed = json.loads(json_str)
+                json_str = _CONTROL_CHARS_RE.sub(' ', json_str)
+                parsed = _json_loads(json_str)
                 logger.info("Successfully parsed JSON response")
                 return parsed
         except Exception as e:
@@ -84,17 +147,15 @@ class Planner:
     
     def _build_plan_markdown(self, data: dict, task: str) -> str:
         """Build PLAN.md from extracted data."""
-        overview = data.get("overview", f"Implementation plan for: {task}")
-        file_structure = data.get("file_structure", "File structure to be determined")
-        frontend_arch = data.get("frontend_architecture", "Frontend architecture to be designed")
-        backend_arch = data.get("backend_architecture", "Backend architecture to be designed")
-        api_endpoints = data.get("api_endpoints", "API endpoints to be defined")
-        dependencies = data.get("dependencies", [])
-        build_commands = data.get("build_commands", [])
+        fields = {**self._DEFAULTS, **data}
+        if "overview" not in data:
+            fields["overview"] = f"Implementation plan for: {task}"
+        dependencies = fields["dependencies"]
+        build_commands = fields["build_commands"]
         
         # Format dependencies
         if isinstance(dependencies, list):
-            deps_str = "\n".join(f"- {dep}" for dep in dependencies)
+            deps_str = "\n".join("- " + str(dep) for dep in dependencies)
         else:
             deps_str = str(dependencies)
         if not deps_str or deps_str == "[]":
@@ -108,31 +169,6 @@ class Planner:
         if not build_str or build_str == "[]":
             build_str = "# Build commands to be determined"
         
-        plan_md = f"""# Architecture Plan
-
-## 1. Overview
-{overview}
-
-## 2. File Structure
-```
-{file_structure}
-```
-
-## 3. Frontend Architecture
-{frontend_arch}
-
-## 4. Backend Architecture
-{backend_arch}
-
-## 5. API Endpoints
-{api_endpoints}
-
-## 6. Dependencies
-{deps_str}
-
-## 7. Build Commands
-```bash
-{build_str}
-```
-"""
-        return plan_md
+        fields["deps_str"] = deps_str
+        fields["build_str"] = build_str
+        return _PLAN_TEMPLATE.format_map(fields)
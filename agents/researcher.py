@@ -5,11 +5,265 @@ Uses MCP fetch server when available, falls back to generic advice.
 """
 
 import os
+import re
 import logging
+from functools import lru_cache
+from itertools import chain
 from typing import Dict, Any, Optional
 
 logger = logging.getLogger('MultiAgentBuilder')
 
+# Pattern: No module named 'modulename'
+_MODULE_RE = re.compile(r"No module named ['\"]([^'\"]+)['\"]")
+# Pattern: name 'varname' is not defined
+_NAME_RE = re.compile(r"name ['\"]([^'\"]+)['\"]")
+
+# Only this many characters of an error are scanned for patterns: the head
+# (message) and the tail (final exception line), never a whole traceback
+_ERROR_SCAN_CHARS = 2048
+
+
+def _error_window(error_message: str) -> str:
+    """Head and tail of an error message, bounded by _ERROR_SCAN_CHARS."""
+    if len(error_message) <= _ERROR_SCAN_CHARS:
+        return error_message
+    half = _ERROR_SCAN_CHARS // 2
+    return error_message[:half] + "\n" + error_message[-half:]
+
+
+def _first_group(pattern: re.Pattern, error_message: str) -> str:
+    """First capture group of pattern in error_message, or "unknown"."""
+    match = pattern.search(error_message)
+    if match:
+        return match.group(1)
+    return "unknown"
+
+
+def _static(solution: dict):
+    """Builder for a solution that doesn't depend on the error text."""
+    return lambda error_message, backend_lang: dict(solution, steps=list(solution["steps"]))
+
+
+# Python-specific errors
+def _module_solution(error_message: str, backend_lang: str) -> dict:
+    module_name = _first_group(_MODULE_RE, error_message)
+    return {
+        "type": "dependency",
+        "title": f"Install missing module: {module_name}",
+        "steps": [
+            f"Run: pip install {module_name}",
+            "Add to requirements.txt",
+            "Verify import after installation"
+        ],
+        "confidence": "high"
+    }
+
+
+# Name errors
+def _name_solution(error_message: str, backend_lang: str) -> dict:
+    var_name = _first_group(_NAME_RE, error_message)
+    return {
+        "type": "undefined",
+        "title": f"Define variable: {var_name}",
+        "steps": [
+            f"Initialize {var_name} before use",
+            "Check for typos in variable name",
+            "Verify variable scope",
+            "Import if it's from a module"
+        ],
+        "confidence": "high"
+    }
+
+
+# Port in use
+def _port_solution(error_message: str, backend_lang: str) -> dict:
+    return {
+        "type": "port",
+        "title": "Port already in use",
+        "steps": [
+            "Kill process using the port",
+            "Use a different port number",
+            "Check for zombie processes",
+            f"For {backend_lang}: change port in config"
+        ],
+        "confidence": "high"
+    }
+
+
+# (lowercase substrings, solution builder) in priority order
+_ERROR_PATTERNS = (
+    (('modulenotfounderror', 'no module named'), _module_solution),
+    # Import errors
+    (('importerror', 'cannot import'), _static({
+        "type": "import",
+        "title": "Fix import statement",
+        "steps": [
+            "Check module name spelling",
+            "Verify module is installed",
+            "Check Python path and virtual environment",
+            "Try: from package import module"
+        ],
+        "confidence": "medium"
+    })),
+    # Syntax errors
+    (('syntaxerror',), _static({
+        "type": "syntax",
+        "title": "Fix syntax error",
+        "steps": [
+            "Check for missing colons, parentheses, or brackets",
+            "Verify indentation is consistent",
+            "Look for unclosed strings or comments",
+            "Check for invalid characters"
+        ],
+        "confidence": "high"
+    })),
+    # Indentation errors
+    (('indentationerror',), _static({
+        "type": "indentation",
+        "title": "Fix indentation",
+        "steps": [
+            "Use consistent indentation (4 spaces recommended)",
+            "Don't mix tabs and spaces",
+            "Check alignment in function definitions",
+            "Verify block structure"
+        ],
+        "confidence": "high"
+    })),
+    (('nameerror',), _name_solution),
+    # Type errors
+    (('typeerror',), _static({
+        "type": "type",
+        "title": "Fix type mismatch",
+        "steps": [
+            "Check argument types match function signature",
+            "Convert types explicitly if needed",
+            "Verify number of arguments",
+            "Check for None values"
+        ],
+        "confidence": "medium"
+    })),
+    # Attribute errors
+    (('attributeerror',), _static({
+        "type": "attribute",
+        "title": "Fix missing attribute",
+        "steps": [
+            "Check spelling of attribute/method name",
+            "Verify object type is correct",
+            "Check documentation for correct API",
+            "Initialize object before use"
+        ],
+        "confidence": "medium"
+    })),
+    # Connection/Network errors
+    (('connectionrefusederror', 'connection refused'), _static({
+        "type": "connection",
+        "title": "Fix connection issue",
+        "steps": [
+            "Start the server/service",
+            "Check if port is correct",
+            "Verify firewall settings",
+            "Check if service is listening on correct interface"
+        ],
+        "confidence": "high"
+    })),
+    (('address already in use', 'port'), _port_solution),
+    # File not found
+    (('filenotfounderror', 'no such file'), _static({
+        "type": "file",
+        "title": "File not found",
+        "steps": [
+            "Check file path is correct",
+            "Use absolute paths or os.path.join()",
+            "Verify file exists in expected location",
+            "Check file permissions"
+        ],
+        "confidence": "high"
+    })),
+    # Permission errors
+    (('permissionerror', 'permission denied'), _static({
+        "type": "permission",
+        "title": "Fix permission issue",
+        "steps": [
+            "Run with appropriate permissions",
+            "Check file/directory permissions",
+            "Close file handles before writing",
+            "Use sudo/admin if necessary (carefully)"
+        ],
+        "confidence": "medium"
+    })),
+)
+
+
+# Flattened to (keyword, builder) so matching is one plain loop, no any() per pattern
+_ERROR_KEYWORDS = tuple((key, build) for keys, build in _ERROR_PATTERNS for key in keys)
+
+# Exception type name (lowercase) -> builder, for errors that name their type.
+# ImportError stays on the keyword scan: "No module named" outranks it there.
+_ERROR_TABLE = {key: build for key, build in _ERROR_KEYWORDS if key.endswith('error') and key != 'importerror'}
+
+
+def _error_type(error_window: str) -> str:
+    """
+    Exception type named at the start of the first or last line, e.g.
+    "NameError: ..." or a traceback's final line. Lowercase, "" if unknown.
+    """
+    head = error_window.partition("\n")[0]
+    tail = error_window.rstrip().rpartition("\n")[2]
+    for line in (head, tail):
+        name = line.split(":", 1)[0].strip().rpartition(".")[2].lower()
+        if name in _ERROR_TABLE:
+            return name
+    return ""
+
+
+@lru_cache(maxsize=128)
+def _cached_solutions(error_message: str, backend_lang: str) -> tuple:
+    """
+    Pattern-based solutions for an error, memoized because Strike-3 often
+    researches the same error again when a fix doesn't take.
+    """
+    window = _error_window(error_message)
+    
+    # Fast path: the error names its exception type
+    error_type = _error_type(window)
+    if error_type:
+        return (_ERROR_TABLE[error_type](error_message, backend_lang),)
+    
+    # First matching keyword wins, in the priority order of _ERROR_PATTERNS
+    error_lower = window.lower()
+    for key, build in _ERROR_KEYWORDS:
+        if key in error_lower:
+            return (build(error_message, backend_lang),)
+    
+    # Generic fallback
+    return ({
+        "type": "generic",
+        "title": "General debugging steps",
+        "steps": [
+            "Read the full error traceback carefully",
+            "Search exact error message online",
+            "Check documentation for the component",
+            "Add debug print statements",
+            "Verify all dependencies are installed",
+            "Check for version compatibility issues"
+        ],
+        "confidence": "low"
+    },)
+
+# Fixed lines around the per-solution sections of a research summary
+_SUMMARY_HEADER = ("=" * 70, "RESEARCHER: Error Analysis & Solutions", "=" * 70)
+_SUMMARY_FOOTER = ("\n" + "=" * 70, "End of research results", "=" * 70)
+
+
+def _render_solution(index: int, solution: dict) -> tuple:
+    """Summary lines for one solution."""
+    return (
+        f"\n### Solution {index}: {solution['title']}",
+        f"Type: {solution['type']}",
+        f"Confidence: {solution['confidence']}",
+        "\nSteps:",
+        *(f"  • {step}" for step in solution['steps'])
+    )
 
 class Researcher:
     """
@@ -117,202 +371,28 @@ class Researcher:
         """
         logger.info("Using pattern-based generic solutions (MCP unavailable)")
         
-        solutions = []
-        error_lower = error_message.lower()
-        
         # Get language context
         backend_lang = language_config.get('backend', {}).get('language', 'python').lower()
-        framework = language_config.get('backend', {}).get('framework', '').lower()
-        
-        # Python-specific errors
-        if 'modulenotfounderror' in error_lower or 'no module named' in error_lower:
-            module_name = self._extract_module_name(error_message)
-            solutions.append({
-                "type": "dependency",
-                "title": f"Install missing module: {module_name}",
-                "steps": [
-                    f"Run: pip install {module_name}",
-                    "Add to requirements.txt",
-                    "Verify import after installation"
-                ],
-                "confidence": "high"
-            })
-        
-        # Import errors
-        elif 'importerror' in error_lower or 'cannot import' in error_lower:
-            solutions.append({
-                "type": "import",
-                "title": "Fix import statement",
-                "steps": [
-                    "Check module name spelling",
-                    "Verify module is installed",
-                    "Check Python path and virtual environment",
-                    "Try: from package import module"
-                ],
-                "confidence": "medium"
-            })
-        
-        # Syntax errors
-        elif 'syntaxerror' in error_lower:
-            solutions.append({
-                "type": "syntax",
-                "title": "Fix syntax error",
-                "steps": [
-                    "Check for missing colons, parentheses, or brackets",
-                    "Verify indentation is consistent",
-                    "Look for unclosed strings or comments",
-                    "Check for invalid characters"
-                ],
-                "confidence": "high"
-            })
-        
-        # Indentation errors
-        elif 'indentationerror' in error_lower:
-            solutions.append({
-                "type": "indentation",
-                "title": "Fix indentation",
-                "steps": [
-                    "Use consistent indentation (4 spaces recommended)",
-                    "Don't mix tabs and spaces",
-                    "Check alignment in function definitions",
-                    "Verify block structure"
-                ],
-                "confidence": "high"
-            })
-        
-        # Name errors
-        elif 'nameerror' in error_lower:
-            var_name = self._extract_variable_name(error_message)
-            solutions.append({
-                "type": "undefined",
-                "title": f"Define variable: {var_name}",
-                "steps": [
-                    f"Initialize {var_name} before use",
-                    "Check for typos in variable name",
-                    "Verify variable scope",
-                    "Import if it's from a module"
-                ],
-                "confidence": "high"
-            })
-        
-        # Type errors
-        elif 'typeerror' in error_lower:
-            solutions.append({
-                "type": "type",
-                "title": "Fix type mismatch",
-                "steps": [
-                    "Check argument types match function signature",
-                    "Convert types explicitly if needed",
-                    "Verify number of arguments",
-                    "Check for None values"
-                ],
-                "confidence": "medium"
-            })
         
-        # Attribute errors
-        elif 'attributeerror' in error_lower:
-            solutions.append({
-                "type": "attribute",
-                "title": "Fix missing attribute",
-                "steps": [
-                    "Check spelling of attribute/method name",
-                    "Verify object type is correct",
-                    "Check documentation for correct API",
-                    "Initialize object before use"
-                ],
-                "confidence": "medium"
-            })
-        
-        # Connection/Network errors
-        elif 'connectionrefusederror' in error_lower or 'connection refused' in error_lower:
-            solutions.append({
-                "type": "connection",
-                "title": "Fix connection issue",
-                "steps": [
-                    "Start the server/service",
-                    "Check if port is correct",
-                    "Verify firewall settings",
-                    "Check if service is listening on correct interface"
-                ],
-                "confidence": "high"
-            })
-        
-        # Port in use
-        elif 'address already in use' in error_lower or 'port' in error_lower:
-            solutions.append({
-                "type": "port",
-                "title": "Port already in use",
-                "steps": [
-                    "Kill process using the port",
-                    "Use a different port number",
-                    "Check for zombie processes",
-                    f"For {backend_lang}: change port in config"
-                ],
-                "confidence": "high"
-            })
-        
-        # File not found
-        elif 'filenotfounderror' in error_lower or 'no such file' in error_lower:
-            solutions.append({
-                "type": "file",
-                "title": "File not found",
-                "steps": [
-                    "Check file path is correct",
-                    "Use absolute paths or os.path.join()",
-                    "Verify file exists in expected location",
-                    "Check file permissions"
-                ],
-                "confidence": "high"
-            })
-        
-        # Permission errors
-        elif 'permissionerror' in error_lower or 'permission denied' in error_lower:
-            solutions.append({
-                "type": "permission",
-                "title": "Fix permission issue",
-                "steps": [
-                    "Run with appropriate permissions",
-                    "Check file/directory permissions",
-                    "Close file handles before writing",
-                    "Use sudo/admin if necessary (carefully)"
-                ],
-                "confidence": "medium"
-            })
-        
-        # Generic fallback
-        if not solutions:
-            solutions.append({
-                "type": "generic",
-                "title": "General debugging steps",
-                "steps": [
-                    "Read the full error traceback carefully",
-                    "Search exact error message online",
-                    "Check documentation for the component",
-                    "Add debug print statements",
-                    "Verify all dependencies are installed",
-                    "Check for version compatibility issues"
-                ],
-                "confidence": "low"
-            })
+        # Copies, so callers can't alter the cached solutions
+        return [dict(solution, steps=list(solution["steps"])) for solution in _cached_solutions(error_message, backend_lang)]
+    
+    def stats(self) -> dict:
+        """
+        Report hit/miss counts of the shared solution cache.
         
-        return solutions
+        Returns:
+            dict: {"hits", "misses", "maxsize", "currsize"}
+        """
+        return _cached_solutions.cache_info()._asdict()
     
     def _extract_module_name(self, error_message: str) -> str:
         """Extract module name from ModuleNotFoundError."""
-        # Pattern: No module named 'modulename'
-        import re
-        match = re.search(r"No module named ['\"]([^'\"]+)['\"]", error_message)
-        if match:
-            return match.group(1)
-        return "unknown"
+        return _first_group(_MODULE_RE, error_message)
     
     def _extract_variable_name(self, error_message: str) -> str:
         """Extract variable name from NameError."""
-        import re
-        match = re.search(r"name ['\"]([^'\"]+)['\"]", error_message)
-        if match:
-            return match.group(1)
-        return "unknown"
+        return _first_group(_NAME_RE, error_message)
     
     def _format_summary(self, error_message: str, solutions: list) -> str:
         """
@@ -325,22 +405,9 @@ class Researcher:
         Returns:
             str: Formatted summary string
         """
-        summary_lines = []
-        summary_lines.append("=" * 70)
-        summary_lines.append("RESEARCHER: Error Analysis & Solutions")
-        summary_lines.append("=" * 70)
-        summary_lines.append(f"\nError: {error_message[:200]}...\n")
-        
-        for i, solution in enumerate(solutions, 1):
-            summary_lines.append(f"\n### Solution {i}: {solution['title']}")
-            summary_lines.append(f"Type: {solution['type']}")
-            summary_lines.append(f"Confidence: {solution['confidence']}")
-            summary_lines.append("\nSteps:")
-            for step in solution['steps']:
-                summary_lines.append(f"  • {step}")
-        
-        summary_lines.append("\n" + "=" * 70)
-        summary_lines.append("End of research results")
-        summary_lines.append("=" * 70)
-        
-        return "\n".join(summary_lines)
+        return "\n".join(chain(
+            _SUMMARY_HEADER,
+            (f"\nError: {error_message[:200]}...\n",),
+            chain.from_iterable(_render_solution(i, solution) for i, solution in enumerate(solutions, 1)),
+            _SUMMARY_FOOTER
+        ))
@@ -1,15 +1,21 @@
 from utils.gemini_client import generate_with_retry, extract_json
 from prompts.templates import PromptTemplates
-from utils.command_executor import execute
+from utils.command_executor import execute, execute_many
 from utils.logger import logger
+import os
 import shlex
 
+# Legacy string commands: POSIX quoting rules except on Windows
+_POSIX = os.name != 'nt'
+
 class TerminalAgent:
     """Executes terminal commands based on AI-generated command list."""
     
     def run(self, task: str, project_path: str, context: dict) -> dict:
         """
         Generates and executes terminal commands.
+        Consecutive commands marked parallel_safe run concurrently;
+        everything else runs serially in order.
         
         Returns:
             dict: {"success": bool, "output": {"results": list}, "error": str/None}
@@ -19,21 +25,55 @@ class TerminalAgent:
             logger.info("TerminalAgent: Generating commands")
             response = generate_with_retry(prompt, temperature=0.2)
             result = extract_json(response)
-            commands = result.get("commands", [])
+            commands = [self._normalize(entry) for entry in result.get("commands", [])]
             
             logger.info(f"TerminalAgent: Executing {len(commands)} commands")
             outputs = []
-            for cmd in commands:
-                logger.info(f"TerminalAgent: Running '{cmd}'")
-                cmd_list = shlex.split(cmd, posix=False)
+            batch = []
+            for cmd, cmd_list, parallel_safe in commands:
+                if parallel_safe:
+                    batch.append((cmd, cmd_list))
+                    continue
+                outputs.extend(self._run_batch(batch, project_path))
+                batch = []
+                logger.info(f"TerminalAgent: Running {cmd_list}")
                 exec_result = execute(cmd_list, cwd=project_path)
+                if not exec_result["success"]:
+                    logger.warning(f"TerminalAgent: Command exited with {exec_result['exit_code']}: {shlex.join(cmd_list)}")
                 outputs.append({
                     "command": cmd,
                     "result": exec_result
                 })
-                
+            outputs.extend(self._run_batch(batch, project_path))
+            
             logger.info("TerminalAgent: All commands executed")
             return {"success": True, "output": {"results": outputs}, "error": None}
         except Exception as e:
             logger.error(f"TerminalAgent error: {e}")
             return {"success": False, "output": {}, "error": str(e)}
+    
+    def _normalize(self, entry) -> tuple:
+        """
+        Accepts {"cmd": [argv...], "parallel_safe": bool}, a bare argv list,
+        or a legacy command string. Entries without the flag are serial.
+        
+        Returns:
+            tuple: (command as given, argv list, parallel_safe)
+        """
+        parallel_safe = False
+        if isinstance(entry, dict):
+            parallel_safe = entry.get("parallel_safe") is True
+            entry = entry.get("cmd", "")
+        if isinstance(entry, list):
+            return entry, [str(arg) for arg in entry], parallel_safe
+        # Legacy shell-style string: tokenized with the platform's quoting rules
+        return entry, shlex.split(str(entry), posix=_POSIX), parallel_safe
+    
+    def _run_batch(self, batch: list, project_path: str) -> list:
+        """Runs a batch of (command, argv) parallel_safe pairs; a single one runs serially."""
+        if len(batch) < 2:
+            return [{"command": cmd, "result": execute(cmd_list, cwd=project_path)} for cmd, cmd_list in batch]
+        cmd_lists = [cmd_list for _, cmd_list in batch]
+        logger.info(f"TerminalAgent: Running {len(batch)} commands in parallel: {cmd_lists}")
+        results = execute_many(cmd_lists, cwd=project_path)
+        return [{"command": cmd, "result": res} for (cmd, _), res in zip(batch, results)]
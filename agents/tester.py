@@ -1,21 +1,23 @@
-from utils.gemini_client import generate_with_retry
+from utils.gemini_client import generate_stream_with_retry
 from prompts.templates import PromptTemplates
 from utils.logger import logger
 
 class Tester:
     """Generates test code for implemented features."""
     
-    def run(self, task: str, project_path: str, context: dict) -> dict:
+    def run(self, task: str, project_path: str, context: dict, steps: list = None) -> dict:
         """
         Generates unit or integration tests.
+        Plan steps, when given, are covered in the one prompt.
         
         Returns:
             dict: {"success": bool, "output": {"code": str}, "error": str/None}
         """
-        prompt = PromptTemplates.tester(task, context)
+        prompt = PromptTemplates.tester(task, context, steps)
         try:
             logger.info("Tester: Generating test code")
-            response = generate_with_retry(prompt, temperature=0.3)
+            # Streamed like the coders; the Tester returns the whole text
+            response = "".join(generate_stream_with_retry(prompt, temperature=0.3))
             logger.info("Tester: Test generation complete")
             return {"success": True, "output": {"code": response}, "error": None}
         except Exception as e:
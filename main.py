@@ -1,8 +1,20 @@
 import os
 import sys
 import re
+import json
 import asyncio
+import logging
+import threading
+from hashlib import blake2b
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+
+# orjson serializes the cache key payload several times faster; stdlib json is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from utils.logger import logger
 from utils.mcp_client import MCPClient, set_mcp_client
 import utils.file_ops as file_ops
@@ -20,6 +32,31 @@ from agents.researcher import Researcher
 
 load_dotenv()
 
+# Plan steps touching these go to FrontendCoder, the rest to BackendCoder
+_FRONTEND_EXTENSIONS = {".html", ".htm", ".css", ".scss", ".js", ".jsx", ".ts", ".tsx", ".vue", ".svelte"}
+
+# Agents that receive a batch of plan steps
+_PLAN_STEP_AGENTS = {"FrontendCoder", "BackendCoder", "Tester"}
+
+# Agents whose successful result can be reused when their inputs recur: the
+# result is data, or files listed in output["files"] that must still exist.
+# Tester is left out: its real input is the code on disk, which the key doesn't cover
+_REUSABLE_AGENTS = {"LanguageSelector", "FrontendCoder", "BackendCoder", "DocumentationAgent"}
+
+# Agents that change project code; their success drops every reused result
+_CODE_WRITERS = {"FrontendCoder", "BackendCoder", "Debugger"}
+
+# Context keys that change every iteration without changing an agent's inputs
+_VOLATILE_CONTEXT_KEYS = {"loop_counter", "last_action", "completed_steps"}
+
+# Workflow order; a failure invalidates reused results from that agent onwards
+_PIPELINE = ("LanguageSelector", "Planner", "FrontendCoder", "BackendCoder",
+             "TerminalAgent", "Tester", "DocumentationAgent", "GitAgent")
+
+# Project name sanitization
+_STRIP_RE = re.compile(r'[^a-z0-9\s]')
+_WS_RE = re.compile(r'\s+')
+
 class MultiAgentBuilder:
     """
     Main orchestrator for the multi-agent development system.
@@ -32,7 +69,8 @@ class MultiAgentBuilder:
         self.project_path = ""
         self.goal = ""
         self.language_config = None
-        self.agent_manager = AgentManager()
+        self.parallel_agents = os.getenv("PARALLEL_AGENTS", "false").lower() == "true"
+        self.agent_manager = AgentManager(parallel=self.parallel_agents)
         self.loop_counter = 0
         self.max_loops = int(os.getenv("MAX_LOOPS", "50"))
         self.error_count = 0
@@ -40,16 +78,48 @@ class MultiAgentBuilder:
         self.state = {
             "last_action": None,
             "last_error": None,
-            "completed_steps": []
+            "completed_steps": [],
+            # Files written by coder agents, in order
+            "generated_files": [],
+            # Planner steps, and the (agent, step_id) pairs already handed out
+            "plan": [],
+            "dispatched_steps": set()
         }
+        # Plan steps per coder/tester prompt; an agent's remaining steps run as further batches
+        self.plan_batch_size = int(os.getenv("PLAN_BATCH_SIZE", "8"))
+        # (agent, Future) for background file writes, drained before each decision
+        self.pending_writes = []
+        # Debug task -> loop it last ran in, to spot a failure that recurs
+        self._debug_cache = {}
+        # (agent, input digest) -> successful result, see _REUSABLE_AGENTS
+        self._agent_output_cache = {}
+        # Guards dispatched_steps, the output cache and _agents; parallel agents share them
+        self._state_lock = threading.Lock()
         
         # MCP Integration
         self.mcp_client = None
         self.mcp_enabled = os.getenv("ENABLE_MCP", "false").lower() == "true"
         
+        # Agents keep no per-call state, so each is created once and reused.
+        # Built on first use: Researcher and GitAgent need the MCP client.
+        self._agent_factories = {
+            "LanguageSelector": LanguageSelector,
+            "Planner": Planner,
+            "FrontendCoder": FrontendCoder,
+            "BackendCoder": BackendCoder,
+            "TerminalAgent": TerminalAgent,
+            "Tester": Tester,
+            "Debugger": Debugger,
+            "DocumentationAgent": DocumentationAgent,
+            "Researcher": lambda: Researcher(self.mcp_client),
+            "GitAgent": lambda: GitAgent(self.mcp_client)
+        }
+        self._agents = {}
+        
         logger.info("MultiAgentBuilder initialized")
         logger.info(f"Max loops: {self.max_loops}, Max errors: {self.max_errors}")
         logger.info(f"MCP enabled: {self.mcp_enabled}")
+        logger.info(f"Parallel agents: {self.parallel_agents}")
     
     def start(self, user_prompt: str) -> None:
         """
@@ -67,17 +137,16 @@ class MultiAgentBuilder:
         self.goal = user_prompt
         self.project_name = self._sanitize_project_name(user_prompt)
         
-        # Create project folder
-        self.project_path = os.path.join("project", self.project_name)
+        # Create project folder. Agents get this absolute path explicitly;
+        # the process CWD is left alone so concurrent agents can't race on it.
+        self.project_path = os.path.abspath(os.path.join("project", self.project_name))
         os.makedirs(self.project_path, exist_ok=True)
         logger.info(f"Project path: {self.project_path}")
         
-        # Change to project directory
-        original_dir = os.getcwd()
-        os.chdir(self.project_path)
-        logger.info(f"Working directory: {os.getcwd()}")
-        
         try:
+            # Drop agents bound to a previous run's MCP client
+            self._agents.clear()
+            
             # Initialize MCP if enabled
             if self.mcp_enabled:
                 self._init_mcp_client()
@@ -85,13 +154,12 @@ class MultiAgentBuilder:
             # Run the agent loop
             self._run_agent_loop()
         finally:
+            # Queued writes must land before the run is reported finished
+            self._drain_pending_writes()
+            
             # Cleanup MCP connections
             if self.mcp_client:
                 asyncio.run(self.mcp_client.close())
-            
-            # Return to original directory
-            os.chdir(original_dir)
-            logger.info(f"Returned to: {os.getcwd()}")
         
         logger.info("=" * 70)
         logger.info("MULTI-AGENT BUILDER FINISHED")
@@ -109,8 +177,8 @@ class MultiAgentBuilder:
         """
         # Take first few words, remove special chars, lowercase
         name = prompt.lower()[:50]
-        name = re.sub(r'[^a-z0-9\s]', '', name)
-        name = re.sub(r'\s+', '_', name.strip())
+        name = _STRIP_RE.sub('', name)
+        name = _WS_RE.sub('_', name.strip())
         
         if not name:
             name = "my_project"
@@ -142,190 +210,431 @@ class MultiAgentBuilder:
         Main agent execution loop.
         Continues until FINISHED or max loops/errors reached.
         """
-        logger.info("\n" + "=" * 70)
-        logger.info("STARTING AGENT LOOP")
-        logger.info("=" * 70)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n" + "=" * 70)
+            logger.info("STARTING AGENT LOOP")
+            logger.info("=" * 70)
         
         while self.loop_counter < self.max_loops:
             self.loop_counter += 1
-            logger.info(f"\n--- Loop {self.loop_counter}/{self.max_loops} ---")
+            logger.info("\n--- Loop %d/%d ---", self.loop_counter, self.max_loops)
+            
+            # Decisions inspect the project files, so finish queued writes first;
+            # a failed write fails the agent that queued it
+            write_failures = self._drain_pending_writes()
+            if not all(self._handle_result(agent_name, {"success": False, "output": {}, "error": error})
+                       for agent_name, error in write_failures.items()):
+                break
             
             # Get current context
             context = self._get_project_context()
             
-            # Decide next agent
+            # Decide next agent. This is local rule evaluation (no LLM call) over
+            # the files the previous agent just wrote, so it is not worth
+            # speculating on while that agent runs: a decision made before its
+            # writes land would be stale.
             decision = self.agent_manager.decide_next_agent(context)
             next_agent = decision["next_agent"]
             reasoning = decision["reasoning"]
             
-            logger.info(f"Decision: {next_agent}")
-            logger.info(f"Reasoning: {reasoning}")
+            logger.info("Decision: %s", next_agent)
+            logger.info("Reasoning: %s", reasoning)
             
             # Check if finished
             if next_agent == "FINISHED":
-                logger.info("\n" + "=" * 70)
-                logger.info("PROJECT COMPLETE!")
-                logger.info("=" * 70)
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("\n" + "=" * 70)
+                    logger.info("PROJECT COMPLETE!")
+                    logger.info("=" * 70)
                 break
             
-            # Execute the agent
+            # Execute the agent(s); independent agents run concurrently
             task = self.goal  # Can be refined per agent
-            result = self._execute_agent(next_agent, task)
-            
-            # Handle result with 3-strike error system (PROJECT_CONTEXT.md lines 998-1018)
-            if result["success"]:
-                logger.info(f"✓ {next_agent} completed successfully")
-                self.state["last_action"] = next_agent
-                self.state["completed_steps"].append(next_agent)
-                self.error_count = 0  # Reset error count on success
+            agents = decision.get("next_agents") or [next_agent]
+            if len(agents) > 1:
+                results = self._execute_agents_parallel(agents, task, context)
             else:
-                logger.error(f"✗ {next_agent} failed: {result['error']}")
-                self.error_count += 1
-                self.state["last_error"] = result["error"]
-                
-                # 3-Strike Error System
-                if self.error_count == 1 or self.error_count == 2:
-                    # Strike 1 & 2: Call Debugger (unless Debugger just ran)
-                    if next_agent != "Debugger":
-                        logger.warning(f"Strike {self.error_count}: Calling Debugger to fix error")
-                        debug_task = f"Fix error from {next_agent}: {result['error']}"
-                        debug_result = self._execute_agent("Debugger", debug_task)
-                        
-                        if debug_result["success"]:
-                            logger.info("Debugger applied fix")
-                            self.error_count = 0  # Reset if debugger succeeds
-                            self.state["last_action"] = "Debugger"
-                        else:
-                            logger.error(f"Debugger also failed: {debug_result['error']}")
+                results = [self._execute_agent(next_agent, task, context)]
+            
+            # Results are handled in decision order so state updates stay deterministic
+            for agent_name, result in zip(agents, results):
+                self.pending_writes.extend((agent_name, future) for future in result.get("pending_writes", []))
+            keep_going = True
+            for agent_name, result in zip(agents, results):
+                if not self._handle_result(agent_name, result):
+                    keep_going = False
+                    break
+            if not keep_going:
+                break
+        
+        # Check if max loops reached
+        if self.loop_counter >= self.max_loops:
+            logger.warning("Max loops (%d) reached. Stopping.", self.max_loops)
+        
+        logger.info("\nCompleted steps: %s", self.state['completed_steps'])
+    
+    def _handle_result(self, next_agent: str, result: dict) -> bool:
+        """
+        Record an agent's result, running the 3-strike error system on failure.
+        
+        Args:
+            next_agent: Name of the agent that ran
+            result: Result from the agent
+            
+        Returns:
+            bool: False if the workflow should terminate
+        """
+        # Handle result with 3-strike error system (PROJECT_CONTEXT.md lines 998-1018)
+        if result["success"]:
+            logger.info("✓ %s completed successfully", next_agent)
+            self.state["last_action"] = next_agent
+            self.state["completed_steps"].append(next_agent)
+            output = result.get("output")
+            if isinstance(output, dict):
+                # A reused result reports files already recorded; keep each path once
+                generated = self.state["generated_files"]
+                seen = set(generated)
+                generated.extend(f for f in dict.fromkeys(output.get("files", [])) if f not in seen)
+            self.error_count = 0  # Reset error count on success
+        else:
+            logger.error("✗ %s failed: %s", next_agent, result['error'])
+            self._invalidate_outputs(next_agent)
+            self.error_count += 1
+            self.state["last_error"] = result["error"]
+            
+            # 3-Strike Error System
+            if self.error_count == 1 or self.error_count == 2:
+                # Strike 1 & 2: Call Debugger (unless Debugger just ran)
+                if next_agent != "Debugger":
+                    logger.warning("Strike %d: Calling Debugger to fix error", self.error_count)
+                    debug_task = f"Fix error from {next_agent}: {result['error']}"
+                    debug_result = self._run_debugger(debug_task)
+                    
+                    if debug_result["success"]:
+                        logger.info("Debugger applied fix")
+                        self.error_count = 0  # Reset if debugger succeeds
+                        self.state["last_action"] = "Debugger"
                     else:
-                        logger.error(f"Strike {self.error_count}: Debugger itself failed")
-                        
-                elif self.error_count >= 3:
-                    # Strike 3: Call Researcher for solutions
-                    logger.warning("=" * 70)
-                    logger.warning("Strike 3: Calling Researcher for error solutions")
-                    logger.warning("=" * 70)
+                        logger.error("Debugger also failed: %s", debug_result['error'])
+                else:
+                    logger.error("Strike %d: Debugger itself failed", self.error_count)
                     
-                    research_task = f"Research solution for: {self.state['last_error']}"
-                    research_result = self._execute_agent("Researcher", research_task)
+            elif self.error_count >= 3:
+                # Strike 3: Call Researcher for solutions
+                logger.warning("=" * 70)
+                logger.warning("Strike 3: Calling Researcher for error solutions")
+                logger.warning("=" * 70)
+                
+                research_task = f"Research solution for: {self.state['last_error']}"
+                research_result = self._execute_agent("Researcher", research_task)
+                
+                if research_result["success"]:
+                    solutions = research_result["output"].get("solutions", [])
+                    summary = research_result["output"].get("summary", "")
                     
-                    if research_result["success"]:
-                        solutions = research_result["output"].get("solutions", [])
-                        summary = research_result["output"].get("summary", "")
-                        
-                        logger.info("\n" + summary)
-                        
-                        # Try to apply the first high-confidence solution automatically
-                        if solutions:
-                            high_conf_solutions = [s for s in solutions if s.get('confidence') == 'high']
-                            if high_conf_solutions:
-                                logger.info("Attempting to apply high-confidence solution...")
-                                # Call debugger with researcher's suggestions
-                                debug_task = f"Apply solution: {high_conf_solutions[0]['steps'][0]}"
-                                debug_result = self._execute_agent("Debugger", debug_task)
-                                
-                                if debug_result["success"]:
-                                    logger.info("✓ Researcher solution applied successfully")
-                                    self.error_count = 0
-                                    self.state["last_action"] = "Debugger"
-                                else:
-                                    logger.error("Failed to apply researcher solution - terminating")
-                                    break
+                    logger.info("\n%s", summary)
+                    
+                    # Try to apply the first high-confidence solution automatically
+                    if solutions:
+                        high_conf_solutions = [s for s in solutions if s.get('confidence') == 'high']
+                        if high_conf_solutions:
+                            logger.info("Attempting to apply high-confidence solution...")
+                            # Call debugger with researcher's suggestions
+                            debug_task = f"Apply solution: {high_conf_solutions[0]['steps'][0]}"
+                            debug_result = self._execute_agent("Debugger", debug_task)
+                            
+                            if debug_result["success"]:
+                                logger.info("✓ Researcher solution applied successfully")
+                                self.error_count = 0
+                                self.state["last_action"] = "Debugger"
                             else:
-                                logger.warning("No high-confidence solutions available - terminating")
-                                break
+                                logger.error("Failed to apply researcher solution - terminating")
+                                return False
                         else:
-                            logger.warning("No solutions found - terminating")
-                            break
+                            logger.warning("No high-confidence solutions available - terminating")
+                            return False
                     else:
-                        logger.error(f"Researcher failed: {research_result.get('error', 'Unknown error')}")
-                        logger.error("Terminating workflow after Strike 3")
-                        break
-
+                        logger.warning("No solutions found - terminating")
+                        return False
+                else:
+                    logger.error("Researcher failed: %s", research_result.get('error', 'Unknown error'))
+                    logger.error("Terminating workflow after Strike 3")
+                    return False
         
-        # Check if max loops reached
-        if self.loop_counter >= self.max_loops:
-            logger.warning(f"Max loops ({self.max_loops}) reached. Stopping.")
+        return True
+    
+    def _run_debugger(self, debug_task: str) -> dict:
+        """
+        Run the Debugger, unless it was given the same task within the last
+        two loops: then its fix didn't take, and asking again would repeat the
+        same LLM query, so the failure is escalated instead.
+        
+        Args:
+            debug_task: Task description for the Debugger
+            
+        Returns:
+            dict: Result from the Debugger, or a failure when escalating
+        """
+        last_loop = self._debug_cache.get(debug_task)
+        if last_loop is not None and self.loop_counter - last_loop <= 2:
+            logger.warning("Same failure recurred after a recent Debugger fix - escalating")
+            return {
+                "success": False,
+                "output": {},
+                "error": "Same failure recurred after Debugger fix"
+            }
         
-        logger.info(f"\nCompleted steps: {self.state['completed_steps']}")
+        debug_result = self._execute_agent("Debugger", debug_task)
+        self._debug_cache[debug_task] = self.loop_counter
+        return debug_result
     
-    def _execute_agent(self, agent_name: str, task: str) -> dict:
+    def _execute_agents_parallel(self, agents: list, task: str, context: dict) -> list:
+        """
+        Execute independent agents concurrently.
+        Agents block on LLM HTTP calls, so threads overlap the waits.
+        
+        Args:
+            agents: Names of the agents to execute
+            task: Task description for the agents
+            context: Project context shared by all of them
+            
+        Returns:
+            list: Results in the same order as agents
+        """
+        logger.info("Executing in parallel: %s", agents)
+        results = {}
+        with ThreadPoolExecutor(max_workers=len(agents)) as pool:
+            futures = {pool.submit(self._execute_agent, agent_name, task, context): agent_name for agent_name in agents}
+            for future in as_completed(futures):
+                agent_name = futures[future]
+                results[agent_name] = future.result()
+                logger.info("%s finished", agent_name)
+        return [results[agent_name] for agent_name in agents]
+    
+    def _drain_pending_writes(self) -> dict:
+        """
+        Wait for background writes queued by agents.
+        
+        Returns:
+            dict: Agent name -> error, for each agent with a failed write
+        """
+        pending, self.pending_writes = self.pending_writes, []
+        failures = {}
+        for agent_name, future in pending:
+            try:
+                error = None if future.result() else "Background file write failed"
+            except Exception as e:
+                error = f"Background file write failed: {e}"
+            if error:
+                logger.error("%s: %s", agent_name, error)
+                failures.setdefault(agent_name, error)
+        return failures
+    
+    def _execute_agent(self, agent_name: str, task: str, context: dict = None) -> dict:
         """
         Execute a specific agent.
         
         Args:
             agent_name: Name of the agent to execute
             task: Task description for the agent
+            context: Project context to use (rebuilt when omitted)
             
         Returns:
             dict: Result from agent {"success": bool, "output": any, "error": str/None}
         """
-        logger.info(f"Executing: {agent_name}")
+        logger.info("Executing: %s", agent_name)
         
-        context = self._get_project_context()
+        # Reuse the iteration's context when given; state may have changed otherwise
+        if context is None:
+            context = self._get_project_context()
         
         try:
-            # Route to appropriate agent
-            if agent_name == "LanguageSelector":
-                agent = LanguageSelector()
-                result = agent.run(task, self.project_path, context)
-                # Save language config to state
-                if result["success"]:
-                    self.language_config = result["output"]
-                    
-            elif agent_name == "Planner":
-                agent = Planner()
-                result = agent.run(task, self.project_path, context)
-                
-            elif agent_name == "FrontendCoder":
-                agent = FrontendCoder()
-                result = agent.run(task, self.project_path, context)
-                
-            elif agent_name == "BackendCoder":
-                agent = BackendCoder()
-                result = agent.run(task, self.project_path, context)
-                
-            elif agent_name == "TerminalAgent":
-                agent = TerminalAgent()
-                result = agent.run(task, self.project_path, context)
-                
-            elif agent_name == "Tester":
-                agent = Tester()
-                result = agent.run(task, self.project_path, context)
-                
-            elif agent_name == "Debugger":
-                agent = Debugger()
-                result = agent.run(task, self.project_path, context)
-                
-            elif agent_name == "DocumentationAgent":
-                agent = DocumentationAgent()
-                result = agent.run(task, self.project_path, context)
-                
-            elif agent_name == "Researcher":
-                agent = Researcher(self.mcp_client)
-                result = agent.run(task, self.project_path, context)
-                
-            elif agent_name == "GitAgent":
-                agent = GitAgent(self.mcp_client)
-                result = agent.run(task, self.project_path, context)
-                
-            else:
-                result = {
+            agent = self._get_agent(agent_name)
+            if agent is None:
+                return {
                     "success": False,
                     "output": {},
                     "error": f"Unknown agent: {agent_name}"
                 }
             
+            steps = self._pending_plan_steps(agent_name) if agent_name in _PLAN_STEP_AGENTS else None
+            
+            # Same inputs as an earlier success whose files are still on disk
+            cache_key = self._output_cache_key(agent_name, task, context, steps)
+            with self._state_lock:
+                cached = self._agent_output_cache.get(cache_key) if cache_key else None
+            reused = cached is not None and self._outputs_present(cached)
+            if reused:
+                logger.info("%s: inputs unchanged since its last success, reusing result", agent_name)
+                result = cached
+            elif agent_name in _PLAN_STEP_AGENTS:
+                result = self._run_plan_batches(agent_name, agent, task, context, steps)
+            else:
+                result = agent.run(task, self.project_path, context)
+            
+            if reused and steps is not None:
+                self._mark_steps_done(agent_name, steps, result)
+            with self._state_lock:
+                if agent_name in _CODE_WRITERS and result["success"] and not reused:
+                    # The code changed, so results computed from the old code are stale
+                    self._agent_output_cache.clear()
+                if cache_key and result["success"]:
+                    # Writes are drained by the loop; a reused result has none left
+                    self._agent_output_cache[cache_key] = {k: v for k, v in result.items() if k != "pending_writes"}
+            
+            # Save language config and plan to state
+            if result["success"]:
+                if agent_name == "LanguageSelector":
+                    self.language_config = result["output"]
+                elif agent_name == "Planner":
+                    self.state["plan"] = result["output"].get("plan", [])
+            
             return result
             
         except Exception as e:
-            logger.error(f"Exception executing {agent_name}: {e}")
+            logger.error("Exception executing %s: %s", agent_name, e)
             return {
                 "success": False,
                 "output": {},
                 "error": str(e)
             }
     
+    def _get_agent(self, agent_name: str):
+        """
+        Return the shared instance of an agent, creating it on first use.
+        
+        Args:
+            agent_name: Name of the agent
+            
+        Returns:
+            The agent instance, or None if the name is unknown
+        """
+        with self._state_lock:
+            agent = self._agents.get(agent_name)
+            if agent is None:
+                factory = self._agent_factories.get(agent_name)
+                if factory is None:
+                    return None
+                agent = self._agents[agent_name] = factory()
+            return agent
+    
+    def _output_cache_key(self, agent_name: str, task: str, context: dict, steps: list = None):
+        """
+        Key an agent run by its inputs, ignoring per-iteration bookkeeping.
+        
+        Args:
+            agent_name: Name of the agent
+            task: Task description for the agent
+            context: Project context
+            steps: Plan steps given to the agent, if any
+            
+        Returns:
+            tuple: (agent_name, digest), or None if the agent is not reusable
+        """
+        if agent_name not in _REUSABLE_AGENTS:
+            return None
+        inputs = {k: v for k, v in context.items() if k not in _VOLATILE_CONTEXT_KEYS}
+        payload = [task, inputs, steps]
+        if orjson is not None:
+            data = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+        else:
+            data = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return agent_name, blake2b(data, digest_size=16).hexdigest()
+    
+    def _outputs_present(self, result: dict) -> bool:
+        """Check that the files a cached result reports are still on disk."""
+        output = result.get("output")
+        files = output.get("files", []) if isinstance(output, dict) else []
+        return all(os.path.isfile(os.path.join(self.project_path, f)) for f in files)
+    
+    def _invalidate_outputs(self, agent_name: str) -> None:
+        """Drop reused results of a failed agent and everything after it in the workflow."""
+        if agent_name in _PIPELINE:
+            stale = set(_PIPELINE[_PIPELINE.index(agent_name):])
+        else:
+            stale = set(_PIPELINE)
+        with self._state_lock:
+            self._agent_output_cache = {
+                key: result for key, result in self._agent_output_cache.items() if key[0] not in stale
+            }
+    
+    def _pending_plan_steps(self, agent_name: str) -> list:
+        """
+        Pick the plan steps a coder or the Tester has not completed yet.
+        
+        Args:
+            agent_name: FrontendCoder, BackendCoder or Tester
+            
+        Returns:
+            list: Steps for this agent not yet completed, in plan order
+        """
+        with self._state_lock:
+            dispatched = set(self.state["dispatched_steps"])
+        steps = []
+        for step in self.state["plan"]:
+            if not isinstance(step, dict) or (agent_name, step.get("step_id")) in dispatched:
+                continue
+            extensions = {os.path.splitext(str(f))[1].lower() for f in step.get("files", [])}
+            is_frontend = bool(extensions & _FRONTEND_EXTENSIONS)
+            is_backend = not extensions or bool(extensions - _FRONTEND_EXTENSIONS)
+            if agent_name == "FrontendCoder" and not is_frontend:
+                continue
+            if agent_name == "BackendCoder" and not is_backend:
+                continue
+            steps.append(step)
+        return steps
+    
+    def _run_plan_batches(self, agent_name: str, agent, task: str, context: dict, steps: list) -> dict:
+        """
+        Run a coder or the Tester over its pending steps, plan_batch_size
+        steps per call (one LLM call covers several files), until the steps
+        run out or a batch fails.
+        
+        Args:
+            agent_name: FrontendCoder, BackendCoder or Tester
+            agent: The agent instance
+            task: Task description for the agent
+            context: Project context
+            steps: Pending plan steps (empty when there is no plan)
+            
+        Returns:
+            dict: The batch results merged into one agent result
+        """
+        if not steps:
+            return agent.run(task, self.project_path, context, steps)
+        
+        merged = None
+        for start in range(0, len(steps), self.plan_batch_size):
+            batch = steps[start:start + self.plan_batch_size]
+            result = agent.run(task, self.project_path, context, batch)
+            self._mark_steps_done(agent_name, batch, result)
+            merged = result if merged is None else self._merge_results(merged, result)
+            if not result["success"]:
+                break
+        return merged
+    
+    def _merge_results(self, first: dict, second: dict) -> dict:
+        """Combine two batch results: lists are concatenated, text is joined."""
+        output = dict(first.get("output") or {})
+        for key, value in (second.get("output") or {}).items():
+            if isinstance(value, list) and isinstance(output.get(key), list):
+                output[key] = output[key] + value
+            elif isinstance(value, str) and isinstance(output.get(key), str):
+                output[key] = output[key] + "\n\n" + value
+            else:
+                output[key] = value
+        merged = {"success": second["success"], "output": output, "error": second["error"]}
+        pending = first.get("pending_writes", []) + second.get("pending_writes", [])
+        if pending:
+            merged["pending_writes"] = pending
+        return merged
+    
+    def _mark_steps_done(self, agent_name: str, steps: list, result: dict) -> None:
+        """Record steps an agent completed so the next batch moves on."""
+        if result["success"]:
+            with self._state_lock:
+                self.state["dispatched_steps"].update((agent_name, step.get("step_id")) for step in steps)
+    
     def _get_project_context(self) -> dict:
         """
         Build context dictionary for agent decisions.
@@ -339,7 +648,8 @@ class MultiAgentBuilder:
             "goal": self.goal,
             "last_action": self.state["last_action"],
             "loop_counter": self.loop_counter,
-            "completed_steps": self.state["completed_steps"]
+            # Snapshot, so the context doesn't change when the live list is appended to
+            "completed_steps": tuple(self.state["completed_steps"])
         }
         
         # Add language config if available
@@ -1,33 +1,45 @@
 import json
 
-class PromptTemplates:
-    @staticmethod
-    def agent_manager(context: dict) -> str:
-        return f"""Role: Agent Manager
-Task: Analyze project state, decide next agent.
-Context: {json.dumps(context)}
-Output (JSON ONLY):
-{{"next_agent": "AgentName", "reasoning": "brief reason"}}
-Rules: No work. Only delegate."""
-
-    @staticmethod
-    def language_selector(goal: str) -> str:
-        return f"""Role: Language Selector
-Task: Choose stack for: "{goal}"
-Output (JSON ONLY):
-{{"language": "lang", "framework": "framework", "reasoning": "why"}}
-Rules: Standard tech. Be concise."""
-
-    @staticmethod
-    def planner(goal: str, language_config: dict) -> str:
-        return f"""# Role: Planner
+# orjson serializes several times faster and emits compact output (fewer
+# prompt tokens); stdlib json with matching settings is the fallback. Keys are
+# sorted and unknown types stringified so the same state always yields the
+# same bytes, keeping provider-side prompt caches warm.
+try:
+    import orjson
+
+    def _dumps(obj, indent: bool = False) -> str:
+        option = orjson.OPT_SORT_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option, default=str).decode()
+except ImportError:
+    def _dumps(obj, indent: bool = False) -> str:
+        if indent:
+            return json.dumps(obj, indent=2, ensure_ascii=False, sort_keys=True, default=str)
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, sort_keys=True, default=str)
+
+def _context_json(context: dict) -> str:
+    # Serialized on every call: context dicts are mutated in place between
+    # prompts, so a cache keyed on the object would return stale JSON
+    return _dumps(context)
+
+def _steps_section(steps: list) -> str:
+    # Several plan steps share one prompt; each file gets its own labeled block
+    if not steps:
+        return ""
+    lines = ["Steps (write one Filename block per file):"]
+    for step in steps:
+        files = ", ".join(map(str, step.get("files", []))) or "any"
+        lines.append(f"{step.get('step_id', '-')}. {step.get('description', '')} [files: {files}]")
+    return "\n".join(lines) + "\n"
+
+# Planner prompt; only the goal and tech stack vary between calls
+_PLANNER_PROMPT = """# Role: Planner
 You are an expert software architect creating detailed implementation plans.
 
 ## Task
 Create a comprehensive architecture plan for: "{goal}"
 
 ## Tech Stack
-{json.dumps(language_config, indent=2)}
+{config_json}
 
 ## Output Format (JSON ONLY)
 Return a single JSON object with these exact keys:
@@ -50,11 +62,37 @@ Return a single JSON object with these exact keys:
 - Plan steps: granular (each < 50 lines code)
 """
 
+# Templates put the fixed Role/Output/Rules text first and the per-call
+# Task/Context last, so consecutive prompts share the longest possible prefix
+class PromptTemplates:
+    @staticmethod
+    def agent_manager(context: dict) -> str:
+        return f"""Role: Agent Manager
+Task: Analyze project state, decide next agent.
+Output (JSON ONLY):
+{{"next_agent": "AgentName", "reasoning": "brief reason"}}
+Rules: No work. Only delegate.
+
+Context: {_context_json(context)}"""
+
+    @staticmethod
+    def language_selector(goal: str) -> str:
+        return f"""Role: Language Selector
+Task: Choose stack for: "{goal}"
+Output (JSON ONLY):
+{{"language": "lang", "framework": "framework", "reasoning": "why"}}
+Rules: Standard tech. Be concise."""
+
     @staticmethod
-    def frontend_coder(task: str, context: dict) -> str:
+    def planner(goal: str, language_config: dict) -> str:
+        return _PLANNER_PROMPT.format_map({
+            "goal": goal,
+            "config_json": _dumps(language_config, indent=True)
+        })
+
+    @staticmethod
+    def frontend_coder(task: str, context: dict, steps: list = None) -> str:
         return f"""Role: Frontend Coder
-Task: "{task}"
-Context: {json.dumps(context)}
 Output: Code in markdown blocks. IMPORTANT: Precede each code block with "Filename: <filename>" on a new line.
 Example:
 Filename: index.html
@@ -65,13 +103,14 @@ Rules:
 1. Clean, semantic code. Modern practices.
 2. NO PLACEHOLDERS. Write the FULL code.
 3. Do not use comments like "// ... rest of code".
-4. Ensure all tags are closed and syntax is correct."""
+4. Ensure all tags are closed and syntax is correct.
+
+Task: "{task}"
+{_steps_section(steps)}Context: {_context_json(context)}"""
 
     @staticmethod
-    def backend_coder(task: str, context: dict) -> str:
+    def backend_coder(task: str, context: dict, steps: list = None) -> str:
         return f"""Role: Backend Coder
-Task: "{task}"
-Context: {json.dumps(context)}
 Output: Code in markdown blocks. IMPORTANT: Precede each code block with "Filename: <filename>" on a new line.
 Example:
 Filename: app.py
@@ -82,64 +121,73 @@ Rules:
 1. Secure, efficient. Handle errors.
 2. NO PLACEHOLDERS. Write the FULL code.
 3. Do not use comments like "# ... implementation".
-4. Ensure all imports are present."""
+4. Ensure all imports are present.
+
+Task: "{task}"
+{_steps_section(steps)}Context: {_context_json(context)}"""
 
     @staticmethod
     def terminal_agent(task: str, context: dict) -> str:
         return f"""Role: Terminal Agent
-Task: "{task}"
-Context: {json.dumps(context)}
 Output (JSON ONLY):
-{{"commands": ["cmd1", "cmd2"], "reasoning": "why"}}
-Rules: Safe commands. No interactive shells."""
+{{"commands": [{{"cmd": ["npm", "install"], "parallel_safe": false}}, {{"cmd": ["mkdir", "logs"], "parallel_safe": true}}], "reasoning": "why"}}
+Rules: Safe commands. No interactive shells. Each cmd is an array of arguments, not a shell string. parallel_safe=true only if the command neither depends on nor conflicts with the other commands.
+
+Task: "{task}"
+Context: {_context_json(context)}"""
 
     @staticmethod
-    def tester(task: str, context: dict) -> str:
+    def tester(task: str, context: dict, steps: list = None) -> str:
         return f"""Role: Tester
-Task: "{task}"
-Context: {json.dumps(context)}
 Output: Test code in markdown blocks.
-Rules: Independent tests. Cover success/failure."""
+Rules: Independent tests. Cover success/failure.
+
+Task: "{task}"
+{_steps_section(steps)}Context: {_context_json(context)}"""
 
     @staticmethod
     def debugger(task: str, context: dict) -> str:
         return f"""Role: Debugger
-Task: "{task}"
-Context: {json.dumps(context)}
 Output: Analysis + fix in markdown blocks.
-Rules: Identify root cause. Verify fix."""
+Rules: Identify root cause. Verify fix.
+
+Task: "{task}"
+Context: {_context_json(context)}"""
 
     @staticmethod
     def documentation_agent(task: str, context: dict) -> str:
         return f"""Role: Documentation Agent
-Task: "{task}"
-Context: {json.dumps(context)}
 Output: Documentation in markdown.
-Rules: Clear, concise. Setup + usage."""
+Rules: Clear, concise. Setup + usage.
+
+Task: "{task}"
+Context: {_context_json(context)}"""
 
     @staticmethod
     def git_agent(task: str, context: dict) -> str:
         return f"""Role: Git Agent
-Task: "{task}"
-Context: {json.dumps(context)}
 Output (JSON ONLY):
 {{"action": "commit", "message": "Generated project: [name]", "files": ["*"]}}
 Rules: 
 1. Initialize .git if not exists
 2. Create .gitignore for project language
 3. Commit all generated files with descriptive message
-4. Return repository status"""
+4. Return repository status
+
+Task: "{task}"
+Context: {_context_json(context)}"""
 
     @staticmethod
     def researcher(task: str, context: dict) -> str:
         return f"""Role: Researcher
-Task: "{task}"
-Context: {json.dumps(context)}
 Output: Analysis with potential solutions
 Rules:
 1. Analyze the error message thoroughly
 2. Search for similar issues and solutions
 3. Provide step-by-step fixes
 4. Include confidence level for each solution
-5. Prioritize solutions by likelihood of success"""
+5. Prioritize solutions by likelihood of success
+
+Task: "{task}"
+Context: {_context_json(context)}"""
 
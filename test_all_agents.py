@@ -7,6 +7,7 @@ from agents.debugger import Debugger
 from agents.terminal_agent import TerminalAgent
 from agents.documentation import DocumentationAgent
 from utils.logger import logger
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
 
 def test_all_agents():
@@ -31,16 +32,24 @@ def test_all_agents():
         ("DocumentationAgent", DocumentationAgent(), "Create README")
     ]
 
-    for agent_name, agent, task in agents:
-        logger.info(f"\n--- Testing {agent_name} ---")
+    def run_agent(agent_name, agent, task):
+        """Run one agent and return its report line as (log level, message)."""
         try:
             result = agent.run(task, project_path, context)
             if result["success"]:
-                logger.info(f"✓ {agent_name}: SUCCESS")
-            else:
-                logger.warning(f"✗ {agent_name}: FAILED - {result['error']}")
+                return "info", f"✓ {agent_name}: SUCCESS"
+            return "warning", f"✗ {agent_name}: FAILED - {result['error']}"
         except Exception as e:
-            logger.error(f"✗ {agent_name}: EXCEPTION - {e}")
+            return "error", f"✗ {agent_name}: EXCEPTION - {e}"
+
+    # Agents are independent, so their LLM calls overlap; each report is
+    # logged in one piece as its agent completes
+    with ThreadPoolExecutor(max_workers=len(agents)) as pool:
+        futures = {pool.submit(run_agent, *entry): entry[0] for entry in agents}
+        for future in as_completed(futures):
+            level, message = future.result()
+            logger.info(f"\n--- Testing {futures[future]} ---")
+            getattr(logger, level)(message)
 
     logger.info("\n" + "=" * 50)
     logger.info("Agent Testing Complete")
@@ -130,6 +130,60 @@ def test_researcher_summary_format():
     print("\n✓ Test 4 passed")
 
 
+
+def test_researcher_long_traceback():
+    """Test that a long traceback is classified by its final exception line."""
+    print("\n=== Test 5: Long Traceback ===")
+    
+    researcher = Researcher(mcp_client=None)
+    
+    frames = '  File "app.py", line 1, in <module>\n    main()\n' * 500
+    context = {
+        'last_error': "Traceback (most recent call last):\n" + frames + "ModuleNotFoundError: No module named 'requests'",
+        'language_config': {'backend': {'language': 'python'}}
+    }
+    
+    result = researcher.run(
+        task="Research solution",
+        project_path="/tmp/test",
+        context=context
+    )
+    
+    solution = result['output']['solutions'][0]
+    print(f"Title: {solution['title']}")
+    
+    assert solution['type'] == "dependency", "Should match the final exception line"
+    assert "requests" in solution['title'], "Should extract the module name"
+    
+    print("\n✓ Test 5 passed")
+
+
+def test_researcher_error_type_wins():
+    """Test that the named exception type beats keywords in the message."""
+    print("\n=== Test 6: Exception Type Lookup ===")
+    
+    researcher = Researcher(mcp_client=None)
+    
+    context = {
+        'last_error': "NameError: name 'SyntaxError' is not defined",
+        'language_config': {'backend': {'language': 'python'}}
+    }
+    
+    result = researcher.run(
+        task="Research solution",
+        project_path="/tmp/test",
+        context=context
+    )
+    
+    solution = result['output']['solutions'][0]
+    print(f"Title: {solution['title']}")
+    
+    assert solution['type'] == "undefined", "Should classify by the NameError type"
+    assert "SyntaxError" in solution['title'], "Should extract the variable name"
+    
+    print("\n✓ Test 6 passed")
+
+
 if __name__ == '__main__':
     print("=" * 70)
     print("RESEARCHER AGENT TESTS")
@@ -140,6 +194,8 @@ if __name__ == '__main__':
         test_researcher_syntax_error()
         test_researcher_connection_refused()
         test_researcher_summary_format()
+        test_researcher_long_traceback()
+        test_researcher_error_type_wins()
         
         print("\n" + "=" * 70)
         print("✓ ALL TESTS PASSED")
@@ -0,0 +1,91 @@
+"""
+Shared pytest fixtures.
+"""
+import copy
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+# Modules that bind each LLM helper at import time, plus utils.gemini_client itself
+_GENERATE_TARGETS = ("utils.gemini_client", "agents.language_selector", "agents.terminal_agent",
+                     "agents.debugger", "agents.documentation")
+_EXTRACT_TARGETS = ("utils.gemini_client", "agents.language_selector", "agents.terminal_agent")
+_STREAM_TARGETS = ("utils.gemini_client", "agents.planner", "agents.tester", "agents.coder_base")
+
+# Default LLM responses, shared by every test (no agent mutates them)
+_DEFAULT_RESPONSE = '{"success": true, "data": "mocked response"}'
+_DEFAULT_JSON = {"success": True, "data": "mocked response"}
+
+# Contents of dummy_context, restored before every test
+_DUMMY_CONTEXT = {
+    "project_name": "test_project",
+    "language_config": {
+        "language": "Python",
+        "framework": "Flask"
+    },
+    "last_action": None
+}
+
+
+def pytest_configure(config):
+    """Register the custom markers (selection is left to -m)."""
+    config.addinivalue_line("markers", "slow: spawns real subprocesses; skip with -m \"not slow\"")
+    config.addinivalue_line("markers", "integration: runs the full orchestrator loop")
+
+
+@pytest.fixture(scope="session")
+def _gemini_mocks():
+    """LLM mocks built once per session and reset before every test."""
+    generate = Mock()
+    # Streaming callers get the generate mock's response as a single chunk
+    stream = Mock(side_effect=lambda *args, **kwargs: iter([generate(*args, **kwargs)]))
+    return SimpleNamespace(generate=generate, extract_json=Mock(), stream=stream)
+
+
+@pytest.fixture(autouse=True)
+def _reset_gemini_mocks(_gemini_mocks):
+    """Restore the default mock responses and clear call history."""
+    mocks = _gemini_mocks
+    mocks.generate.reset_mock(return_value=True, side_effect=True)
+    mocks.extract_json.reset_mock(return_value=True, side_effect=True)
+    mocks.stream.reset_mock()
+
+    mocks.generate.return_value = _DEFAULT_RESPONSE
+    mocks.extract_json.return_value = _DEFAULT_JSON
+
+
+@pytest.fixture(scope="module")
+def mock_gemini_client(_gemini_mocks):
+    """Mock the gemini_client helpers to avoid real API calls (patched once per module)."""
+    with pytest.MonkeyPatch.context() as mp:
+        for module in _GENERATE_TARGETS:
+            mp.setattr(f"{module}.generate_with_retry", _gemini_mocks.generate)
+        for module in _EXTRACT_TARGETS:
+            mp.setattr(f"{module}.extract_json", _gemini_mocks.extract_json)
+        for module in _STREAM_TARGETS:
+            mp.setattr(f"{module}.generate_stream_with_retry", _gemini_mocks.stream)
+        yield _gemini_mocks
+
+
+@pytest.fixture(scope="module")
+def dummy_context():
+    """Provide a dummy context for agent testing."""
+    return copy.deepcopy(_DUMMY_CONTEXT)
+
+
+@pytest.fixture(autouse=True)
+def _reset_dummy_context(request):
+    """Undo changes a previous test made to the shared dummy_context."""
+    if "dummy_context" in request.fixturenames:
+        context = request.getfixturevalue("dummy_context")
+        context.clear()
+        context.update(copy.deepcopy(_DUMMY_CONTEXT))
+
+
+@pytest.fixture
+def fake_dir(request):
+    """Empty directory on a pyfakefs in-memory filesystem (skipped if pyfakefs is missing)."""
+    pytest.importorskip("pyfakefs")
+    fs = request.getfixturevalue("fs")
+    fs.create_dir("/tmp/test")
+    return "/tmp/test"
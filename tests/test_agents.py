@@ -2,8 +2,9 @@
 Unit tests for all agent classes.
 Uses pytest with mocking to avoid real API calls.
 """
+import json
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import Mock
 from agents.language_selector import LanguageSelector
 from agents.planner import Planner
 from agents.frontend_coder import FrontendCoder
@@ -12,146 +13,145 @@ from agents.terminal_agent import TerminalAgent
 from agents.tester import Tester
 from agents.debugger import Debugger
 from agents.documentation import DocumentationAgent
+from agents.agent_manager import AgentManager
+from prompts.templates import PromptTemplates
+
+
+# Successful command_executor.execute result (mocks never mutate it)
+MOCK_EXEC_SUCCESS = {
+    "success": True,
+    "stdout": "Successfully installed",
+    "stderr": "",
+    "exit_code": 0
+}
+
+# Canned LLM responses for TestAgentRun
+PLANNER_RESPONSE = json.dumps({
+    "plan": [
+        {"step_id": 1, "description": "Setup", "files": ["main.py"]}
+    ],
+    "overview": "Test project overview",
+    "file_structure": "project/\n├── main.py\n└── README.md",
+    "frontend_architecture": "Simple HTML/CSS",
+    "backend_architecture": "Flask API server",
+    "api_endpoints": "GET /api/test",
+    "dependencies": ["flask==3.0.0"],
+    "build_commands": ["pip install -r requirements.txt", "python main.py"]
+})
+
+FRONTEND_RESPONSE = """
+Filename: index.html
+```html
+<!DOCTYPE html>
+<html>
+<head><title>Login</title></head>
+<body>
+  <form id="login"><input name="user"><button>Sign in</button></form>
+</body>
+</html>
+```
+"""
 
+BACKEND_RESPONSE = """
+Filename: app.py
+```python
+from flask import Flask
 
-@pytest.fixture
-def mock_gemini_client():
-    """Mock the gemini_client module to avoid real API calls."""
-    with patch('utils.gemini_client.generate_with_retry') as mock_generate, \
-         patch('utils.gemini_client.extract_json') as mock_extract:
-        
-        # Default mock responses
-        mock_generate.return_value = '{"success": true, "data": "mocked response"}'
-        mock_extract.return_value = {"success": True, "data": "mocked response"}
-        
-        yield {
-            'generate': mock_generate,
-            'extract_json': mock_extract
-        }
+app = Flask(__name__)
 
 
-@pytest.fixture
-def dummy_context():
-    """Provide a dummy context for agent testing."""
-    return {
-        "project_name": "test_project",
-        "language_config": {
-            "language": "Python",
-            "framework": "Flask"
-        },
-        "last_action": None
-    }
+@app.route("/api/hello")
+def hello():
+    return {"message": "Hello"}
+```
+"""
 
+TESTER_RESPONSE = """
+Filename: tests/test_app.py
+```python
+from app import app
 
-class TestLanguageSelector:
-    """Test LanguageSelector agent."""
-    
-    def test_language_selector_run(self, mock_gemini_client, dummy_context):
-        """Test LanguageSelector returns correct structure."""
-        mock_gemini_client['extract_json'].return_value = {
-            "language": "Python",
-            "framework": "Flask",
-            "reasoning": "Test"
-        }
-        
-        agent = LanguageSelector()
-        result = agent.run("Build a web app", "/test/path", dummy_context)
-        
-        assert "success" in result
-        assert "output" in result
-        assert "error" in result
-        assert result["success"] is True
-        assert result["error"] is None
 
+def test_hello():
+    assert app.test_client().get("/api/hello").status_code == 200
+```
+"""
 
-class TestPlanner:
-    """Test Planner agent."""
-    
-    def test_planner_run(self, mock_gemini_client, dummy_context, tmp_path):
-        """Test Planner returns correct structure."""
-        mock_gemini_client['extract_json'].return_value = {
-            "plan": [
-                {"step_id": 1, "description": "Setup", "files": ["main.py"]}
-            ],
-            "overview": "Test project overview",
-            "file_structure": "project/\n├── main.py\n└── README.md",
-            "frontend_architecture": "Simple HTML/CSS",
-            "backend_architecture": "Flask API server",
-            "api_endpoints": "GET /api/test",
-            "dependencies": ["flask==3.0.0"],
-            "build_commands": ["pip install -r requirements.txt", "python main.py"]
-        }
-        
-        agent = Planner()
-        result = agent.run("Build a web app", str(tmp_path), dummy_context)
-        
-        assert "success" in result
-        assert "output" in result
-        assert "error" in result
-        assert result["success"] is True
+DEBUGGER_RESPONSE = """
+# Bug Analysis
+The error is caused by...
 
+# Fix
+```python
+def fixed_function():
+    return "fixed"
+```
+"""
 
+DOCUMENTATION_RESPONSE = """
+# My Project
 
-class TestFrontendCoder:
-    """Test FrontendCoder agent."""
-    
-    def test_frontend_coder_run(self, mock_gemini_client, dummy_context):
-        """Test FrontendCoder returns correct structure."""
-        mock_gemini_client['generate'].return_value = """
-```html
-<html><body>Test</body></html>
-```
+## Installation
+pip install -r requirements.txt
+
+## Usage
+python main.py
 """
-        
-        agent = FrontendCoder()
-        result = agent.run("Create login page", "/test/path", dummy_context)
-        
-        assert "success" in result
-        assert "output" in result
-        assert "error" in result
-        assert result["success"] is True
-        assert "code" in result["output"]
 
 
-class TestBackendCoder:
-    """Test BackendCoder agent."""
+class TestAgentRun:
+    """Test each LLM-backed agent returns the standard result structure."""
     
-    def test_backend_coder_run(self, mock_gemini_client, dummy_context):
-        """Test BackendCoder returns correct structure."""
-        mock_gemini_client['generate'].return_value = """
-```python
-def hello():
-    return "Hello"
-```
-"""
-        
-        agent = BackendCoder()
-        result = agent.run("Create API endpoint", "/test/path", dummy_context)
+    @pytest.mark.parametrize("agent_cls, mock_key, mock_value, task, output_key, files", [
+        (LanguageSelector, "extract_json", {
+            "language": "Python",
+            "framework": "Flask",
+            "reasoning": "Test"
+        }, "Build a web app", None, []),
+        (Planner, "generate", PLANNER_RESPONSE, "Build a web app", "plan", ["PLAN.md"]),
+        (FrontendCoder, "generate", FRONTEND_RESPONSE, "Create login page", "files", ["index.html"]),
+        (BackendCoder, "generate", BACKEND_RESPONSE, "Create API endpoint", "files", ["app.py"]),
+        (Tester, "generate", TESTER_RESPONSE, "Test the API", "code", []),
+        (Debugger, "generate", DEBUGGER_RESPONSE, "Fix TypeError", "analysis", []),
+        (DocumentationAgent, "generate", DOCUMENTATION_RESPONSE, "Create README", "documentation", [])
+    ], ids=["LanguageSelector", "Planner", "FrontendCoder", "BackendCoder",
+            "Tester", "Debugger", "DocumentationAgent"])
+    def test_agent_run(self, agent_cls, mock_key, mock_value, task, output_key, files,
+                       mock_gemini_client, dummy_context, tmp_path):
+        """Test the agent returns correct structure and writes its files."""
+        getattr(mock_gemini_client, mock_key).return_value = mock_value
+        
+        result = agent_cls().run(task, str(tmp_path), dummy_context)
         
         assert "success" in result
         assert "output" in result
         assert "error" in result
         assert result["success"] is True
-        assert "code" in result["output"]
+        assert result["error"] is None
+        if output_key:
+            assert output_key in result["output"]
+        
+        # The Planner writes PLAN.md in the background
+        for pending in result.get("pending_writes", []):
+            assert pending.result() is True
+        for name in files:
+            assert (tmp_path / name).is_file()
+        if output_key == "files":
+            assert result["output"]["files"] == files
 
 
 class TestTerminalAgent:
     """Test TerminalAgent agent."""
     
-    @patch('utils.command_executor.execute')
-    def test_terminal_agent_run(self, mock_execute, mock_gemini_client, dummy_context):
+    def test_terminal_agent_run(self, mock_gemini_client, dummy_context, monkeypatch):
         """Test TerminalAgent returns correct structure."""
-        mock_gemini_client['extract_json'].return_value = {
+        mock_gemini_client.extract_json.return_value = {
             "commands": ["pip install flask"],
             "reasoning": "Install dependencies"
         }
         
-        mock_execute.return_value = {
-            "success": True,
-            "stdout": "Successfully installed",
-            "stderr": "",
-            "exit_code": 0
-        }
+        mock_execute = Mock(return_value=MOCK_EXEC_SUCCESS)
+        monkeypatch.setattr("agents.terminal_agent.execute", mock_execute)
         
         agent = TerminalAgent()
         result = agent.run("Install Flask", "/test/path", dummy_context)
@@ -161,112 +161,63 @@ class TestTerminalAgent:
         assert "error" in result
         assert result["success"] is True
         assert "results" in result["output"]
-
-
-class TestTester:
-    """Test Tester agent."""
-    
-    def test_tester_run(self, mock_gemini_client, dummy_context):
-        """Test Tester returns correct structure."""
-        mock_gemini_client['generate'].return_value = """
-```python
-def test_example():
-    assert True
-```
-"""
-        
-        agent = Tester()
-        result = agent.run("Test the API", "/test/path", dummy_context)
-        
-        assert "success" in result
-        assert "output" in result
-        assert "error" in result
-        assert result["success"] is True
-        assert "code" in result["output"]
-
-
-class TestDebugger:
-    """Test Debugger agent."""
-    
-    def test_debugger_run(self, mock_gemini_client, dummy_context):
-        """Test Debugger returns correct structure."""
-        mock_gemini_client['generate'].return_value = """
-# Bug Analysis
-The error is caused by...
-
-# Fix
-```python
-def fixed_function():
-    return "fixed"
-```
-"""
-        
-        agent = Debugger()
-        result = agent.run("Fix TypeError", "/test/path", dummy_context)
-        
-        assert "success" in result
-        assert "output" in result
-        assert "error" in result
-        assert result["success"] is True
-        assert "analysis" in result["output"]
-
-
-class TestDocumentationAgent:
-    """Test DocumentationAgent agent."""
-    
-    def test_documentation_agent_run(self, mock_gemini_client, dummy_context):
-        """Test DocumentationAgent returns correct structure."""
-        mock_gemini_client['generate'].return_value = """
-# My Project
-
-## Installation
-pip install -r requirements.txt
-
-## Usage
-python main.py
-"""
-        
-        agent = DocumentationAgent()
-        result = agent.run("Create README", "/test/path", dummy_context)
-        
-        assert "success" in result
-        assert "output" in result
-        assert "error" in result
-        assert result["success"] is True
-        assert "documentation" in result["output"]
+        mock_execute.assert_called_once()
 
 
 class TestAllAgentsErrorHandling:
     """Test that all agents handle errors gracefully."""
     
-    @patch('utils.gemini_client.generate_with_retry')
-    @patch('utils.command_executor.execute')  # Mock command executor for TerminalAgent
-    def test_agents_handle_api_errors(self, mock_execute, mock_generate):
-        """Test all agents handle API errors gracefully."""
+    @pytest.mark.parametrize("agent_cls", [
+        LanguageSelector,
+        Planner,
+        FrontendCoder,
+        BackendCoder,
+        Tester,
+        Debugger,
+        DocumentationAgent,
+        TerminalAgent
+    ], ids=lambda cls: cls.__name__)
+    def test_agents_handle_api_errors(self, agent_cls, mock_gemini_client, monkeypatch):
+        """Test each agent handles API errors gracefully."""
         # Make the API call fail
-        mock_generate.side_effect = Exception("API Error")
+        mock_gemini_client.generate.side_effect = Exception("API Error")
         
         # Mock command executor to succeed (won't be called due to API error)
-        mock_execute.return_value = {"success": True, "stdout": "", "stderr": "", "exit_code": 0}
-        
-        agents = [
-            LanguageSelector(),
-            Planner(),
-            FrontendCoder(),
-            BackendCoder(),
-            Tester(),
-            Debugger(),
-            DocumentationAgent(),
-            TerminalAgent()  # Added TerminalAgent
-        ]
+        monkeypatch.setattr("agents.terminal_agent.execute", Mock(return_value=MOCK_EXEC_SUCCESS))
         
         context = {"language_config": {}}
+        result = agent_cls().run("Test task", "/test/path", context)
         
-        for agent in agents:
-            result = agent.run("Test task", "/test/path", context)
-            
-            # Should return error structure, not raise exception
-            assert "success" in result
-            assert result["success"] is False
-            assert result["error"] is not None
-            assert "API Error" in result["error"]
+        # Should return error structure, not raise exception
+        assert "success" in result
+        assert result["success"] is False
+        assert result["error"] is not None
+        assert "API Error" in result["error"]
+
+
+class TestPromptTemplates:
+    """Test prompt rendering."""
+    
+    def test_prompt_reflects_context_changed_in_place(self, dummy_context):
+        """Test a context dict mutated between prompts is serialized afresh."""
+        assert "Flask" in PromptTemplates.debugger("Fix error", dummy_context)
+        dummy_context["language_config"] = {"language": "Go", "framework": "Gin"}
+        
+        prompt = PromptTemplates.debugger("Fix error", dummy_context)
+        assert "Gin" in prompt
+        assert "Flask" not in prompt
+    
+    def test_planner_prompt_reflects_config_changed_in_place(self):
+        """Test the planner's tech-stack JSON follows in-place changes."""
+        config = {"language": "Python", "framework": "Flask"}
+        assert "Flask" in PromptTemplates.planner("Build app", config)
+        config["framework"] = "Django"
+        
+        prompt = PromptTemplates.planner("Build app", config)
+        assert "Django" in prompt
+        assert "Flask" not in prompt
+    
+    def test_steps_with_non_string_files(self, dummy_context):
+        """Test plan steps whose file entries are not strings still render."""
+        steps = [{"step_id": 1, "description": "Setup", "files": ["app.py", 42, None]}]
+        assert "[files: app.py, 42, None]" in PromptTemplates.backend_coder("Build app", dummy_context, steps)
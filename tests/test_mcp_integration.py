@@ -3,12 +3,11 @@ Tests for MCP integration in App Builder.
 Verifies graceful fallback and MCP functionality.
 """
 
-import unittest
 import os
 import sys
-import tempfile
-import shutil
-from unittest.mock import Mock, patch, AsyncMock
+import asyncio
+import pytest
+from unittest.mock import Mock, AsyncMock
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -17,174 +16,187 @@ from utils.mcp_client import MCPClient, set_mcp_client, get_mcp_client
 import utils.file_ops as file_ops
 
 
-class TestMCPClient(unittest.TestCase):
+@pytest.fixture(scope="module")
+def client():
+    """Disconnected MCPClient; the tests only read its state."""
+    return MCPClient()
+
+
+@pytest.fixture(autouse=True)
+def _reset_mcp(monkeypatch):
+    """Run every test without an MCP client; the old ones come back afterwards."""
+    monkeypatch.setattr(file_ops, '_mcp_client', None)
+    monkeypatch.setattr('utils.mcp_client._mcp_client_instance', None)
+
+
+# MCP client with no servers connected; shared by the fallback tests
+_NO_SERVERS = Mock(is_available=Mock(return_value=False))
+
+
+class TestMCPClient:
     """Test MCP client initialization and connection management."""
     
-    def setUp(self):
-        """Set up test environment."""
-        self.client = MCPClient()
-        
-    def test_client_initialization(self):
+    def test_client_initialization(self, client):
         """Test MCPClient can be instantiated."""
-        self.assertIsNotNone(self.client)
-        self.assertEqual(len(self.client.servers), 0)
-        self.assertEqual(len(self.client.available_servers), 0)
+        assert client is not None
+        assert len(client.servers) == 0
+        assert len(client.available_servers) == 0
         
-    def test_is_available_returns_false_when_not_connected(self):
+    def test_is_available_returns_false_when_not_connected(self, client):
         """Test is_available returns False for disconnected servers."""
-        self.assertFalse(self.client.is_available('filesystem'))
-        self.assertFalse(self.client.is_available('github'))
+        assert not client.is_available('filesystem')
+        assert not client.is_available('github')
         
-    def test_get_set_mcp_client(self):
+    def test_get_set_mcp_client(self, client):
         """Test global MCP client getter/setter."""
-        set_mcp_client(self.client)
-        self.assertEqual(get_mcp_client(), self.client)
-        
-        # Cleanup
-        set_mcp_client(None)
+        set_mcp_client(client)
+        assert get_mcp_client() is client
 
 
-class TestFileOpsWithMCP(unittest.TestCase):
+class TestFileOpsWithMCP:
     """Test file operations with MCP integration."""
     
-    def setUp(self):
-        """Set up test environment with temp directory."""
-        self.test_dir = tempfile.mkdtemp()
-        self.test_file = os.path.join(self.test_dir, 'test.txt')
-        
-        # Clear any existing MCP client
-        file_ops.set_mcp_client(None)
-        
-    def tearDown(self):
-        """Clean up test directory."""
-        if os.path.exists(self.test_dir):
-            shutil.rmtree(self.test_dir)
-    
-    def test_write_file_without_mcp(self):
+    def test_write_file_without_mcp(self, tmp_path):
         """Test file writing works without MCP (native fallback)."""
+        test_file = tmp_path / 'test.txt'
         content = "Hello, World!"
-        result = file_ops.write_file(self.test_file, content)
-        
-        self.assertTrue(result)
-        self.assertTrue(os.path.exists(self.test_file))
+        result = file_ops.write_file(str(test_file), content)
         
-        with open(self.test_file, 'r') as f:
-            self.assertEqual(f.read(), content)
+        assert result
+        assert test_file.read_text() == content
     
-    def test_read_file_without_mcp(self):
+    def test_read_file_without_mcp(self, tmp_path):
         """Test file reading works without MCP (native fallback)."""
+        test_file = tmp_path / 'test.txt'
         content = "Test content"
-        
-        # Write file
-        with open(self.test_file, 'w') as f:
-            f.write(content)
+        test_file.write_text(content)
         
         # Read via file_ops
-        result = file_ops.read_file(self.test_file)
-        self.assertEqual(result, content)
+        assert file_ops.read_file(str(test_file)) == content
     
-    def test_write_file_creates_directories(self):
+    def test_write_file_creates_directories(self, fake_dir):
         """Test that write_file creates parent directories."""
-        nested_file = os.path.join(self.test_dir, 'nested', 'dir', 'file.txt')
-        content = "Nested content"
+        nested_file = os.path.join(fake_dir, 'nested', 'dir', 'file.txt')
         
-        result = file_ops.write_file(nested_file, content)
+        result = file_ops.write_file(nested_file, "Nested content")
         
-        self.assertTrue(result)
-        self.assertTrue(os.path.exists(nested_file))
+        assert result
+        assert os.path.exists(nested_file)
         
     def test_read_nonexistent_file_returns_empty(self):
         """Test reading non-existent file returns empty string."""
-        result = file_ops.read_file('/nonexistent/file.txt')
-        self.assertEqual(result, "")
+        assert file_ops.read_file('/nonexistent/file.txt') == ""
     
-    def test_file_exists(self):
+    def test_file_exists(self, tmp_path):
         """Test file_exists function."""
-        # Non-existent file
-        self.assertFalse(file_ops.file_exists(self.test_file))
+        test_file = tmp_path / 'test.txt'
         
-        # Create file
-        with open(self.test_file, 'w') as f:
-            f.write("test")
+        # Non-existent file
+        assert not file_ops.file_exists(str(test_file))
         
-        # Should exist now
-        self.assertTrue(file_ops.file_exists(self.test_file))
+        # Should exist once created
+        test_file.write_text("test")
+        assert file_ops.file_exists(str(test_file))
     
-    def test_list_files(self):
+    def test_list_files(self, fake_dir):
         """Test list_files function."""
         # Empty directory
-        files = file_ops.list_files(self.test_dir)
-        self.assertEqual(files, [])
+        assert file_ops.list_files(fake_dir) == []
         
         # Create some files
         for i in range(3):
-            filepath = os.path.join(self.test_dir, f'file{i}.txt')
-            with open(filepath, 'w') as f:
+            with open(os.path.join(fake_dir, f'file{i}.txt'), 'w') as f:
                 f.write(f"content {i}")
         
         # List files
-        files = file_ops.list_files(self.test_dir)
-        self.assertEqual(len(files), 3)
-        self.assertIn('file0.txt', files)
-        self.assertIn('file1.txt', files)
-        self.assertIn('file2.txt', files)
+        files = file_ops.list_files(fake_dir)
+        assert len(files) == 3
+        assert 'file0.txt' in files
+        assert 'file1.txt' in files
+        assert 'file2.txt' in files
 
 
-class TestMCPGracefulFallback(unittest.TestCase):
+class TestMCPGracefulFallback:
     """Test graceful fallback when MCP is unavailable."""
     
-    def setUp(self):
-        """Set up test environment."""
-        self.test_dir = tempfile.mkdtemp()
-        
-    def tearDown(self):
-        """Clean up."""
-        if os.path.exists(self.test_dir):
-            shutil.rmtree(self.test_dir)
-        file_ops.set_mcp_client(None)
-    
-    def test_file_ops_with_unavailable_mcp_client(self):
+    def test_file_ops_with_unavailable_mcp_client(self, tmp_path):
         """Test file_ops falls back gracefully when MCP client has no servers."""
-        # Create MCP client with no servers
-        mock_client = Mock()
-        mock_client.is_available.return_value = False
-        
-        file_ops.set_mcp_client(mock_client)
+        file_ops.set_mcp_client(_NO_SERVERS)
         
         # File operations should still work via native fallback
-        test_file = os.path.join(self.test_dir, 'test.txt')
+        test_file = str(tmp_path / 'test.txt')
         content = "Fallback test"
         
-        result = file_ops.write_file(test_file, content)
-        self.assertTrue(result)
-        
-        read_content = file_ops.read_file(test_file)
-        self.assertEqual(read_content, content)
+        assert file_ops.write_file(test_file, content)
+        assert file_ops.read_file(test_file) == content
 
 
-class TestMCPIntegration(unittest.TestCase):
-    """Integration tests for MCP system."""
+class TestFileOpsViaMCP:
+    """Test file operations routed through a connected MCP filesystem server."""
     
-    def test_system_works_without_mcp_env(self):
-        """Test that system initializes correctly without ENABLE_MCP."""
-        # This would normally be tested with the full orchestrator
-        # For now, just verify imports work
-        from main import MultiAgentBuilder
-        
-        with patch.dict(os.environ, {'ENABLE_MCP': 'false'}):
-            builder = MultiAgentBuilder()
-            self.assertFalse(builder.mcp_enabled)
-            self.assertIsNone(builder.mcp_client)
+    def test_write_and_read_use_mcp(self):
+        """Test MCP calls run on the background loop, also from inside a running loop."""
+        mcp = Mock(is_available=Mock(return_value=True))
+        mcp.call_tool = AsyncMock(side_effect=[None, "from mcp"])
+        file_ops.set_mcp_client(mcp)
+        
+        async def from_coroutine():
+            # Sync file_ops called while this thread's loop is running
+            return file_ops.read_file('/remote/file.txt')
+        
+        assert file_ops.write_file('/remote/file.txt', "content", force_mcp=True) is True
+        assert asyncio.run(from_coroutine()) == "from mcp"
+        assert [c.args[1] for c in mcp.call_tool.call_args_list] == ['write_file', 'read_file']
     
-    def test_system_handles_mcp_enabled(self):
-        """Test system initializes with MCP enabled."""
-        from main import MultiAgentBuilder
-        
-        with patch.dict(os.environ, {'ENABLE_MCP': 'true'}):
-            builder = MultiAgentBuilder()
-            self.assertTrue(builder.mcp_enabled)
-            # mcp_client will be None until _init_mcp_client is called
+    def test_timed_out_mcp_write_is_cancelled(self, tmp_path, monkeypatch):
+        """Test a timed-out MCP write is cancelled before the native fallback."""
+        cancelled = []
+        
+        async def slow_call(*args, **kwargs):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+        
+        mcp = Mock(is_available=Mock(return_value=True))
+        mcp.call_tool = slow_call
+        file_ops.set_mcp_client(mcp)
+        monkeypatch.setattr(file_ops, '_MCP_TIMEOUT', 0.05)
+        
+        test_file = tmp_path / 'late.txt'
+        assert file_ops.write_file(str(test_file), "native", force_mcp=True) is True
+        assert test_file.read_text() == "native"
+        # Cancellation is delivered on the background loop
+        file_ops._run_async(asyncio.sleep(0))
+        assert cancelled == [True]
+    
+    def test_small_ops_skip_mcp(self, tmp_path):
+        """Test small single writes and reads of small local files stay native."""
+        mcp = Mock(is_available=Mock(return_value=True))
+        mcp.call_tool = AsyncMock()
+        file_ops.set_mcp_client(mcp)
+        
+        test_file = str(tmp_path / 'config.json')
+        assert file_ops.write_file(test_file, "{}") is True
+        assert file_ops.read_file(test_file) == "{}"
+        mcp.call_tool.assert_not_called()
+        
+        # Large content goes through MCP
+        file_ops.write_file(test_file, "x" * file_ops._SMALL_OP_BYTES)
+        assert mcp.call_tool.call_count == 1
 
 
-if __name__ == '__main__':
-    unittest.main()
+class TestMCPIntegration:
+    """Integration tests for MCP system."""
+    
+    @pytest.mark.parametrize("flag, enabled", [("false", False), ("true", True)])
+    def test_system_reads_enable_mcp(self, monkeypatch, flag, enabled):
+        """Test the system honours ENABLE_MCP at construction."""
+        from main import MultiAgentBuilder
+        
+        monkeypatch.setenv('ENABLE_MCP', flag)
+        builder = MultiAgentBuilder()
+        assert builder.mcp_enabled is enabled
+        # mcp_client stays None until _init_mcp_client is called
+        assert builder.mcp_client is None
@@ -18,71 +18,85 @@ def temp_project_dir(tmp_path):
     # Cleanup handled by tmp_path
 
 
+# Simulate a simple workflow: LanguageSelector -> Planner -> FINISHED
+DECISION_SEQUENCE = [
+    {"next_agent": "LanguageSelector", "reasoning": "Select tech stack"},
+    {"next_agent": "Planner", "reasoning": "Create plan"},
+    {"next_agent": "FINISHED", "reasoning": "All done"}
+]
+
+
+@pytest.fixture(scope="module")
+def _manager_template():
+    """AgentManager class mock built once per module and reset per test."""
+    mock_manager = Mock()
+    return Mock(return_value=mock_manager)
+
+
 @pytest.fixture
-def mock_agent_manager():
+def mock_agent_manager(_manager_template, monkeypatch):
     """Mock AgentManager to simulate a short workflow."""
-    with patch('main.AgentManager') as MockAgentManager:
-        mock_manager = Mock()
-        
-        # Simulate a simple workflow: LanguageSelector -> Planner -> FINISHED
-        decision_sequence = [
-            {"next_agent": "LanguageSelector", "reasoning": "Select tech stack"},
-            {"next_agent": "Planner", "reasoning": "Create plan"},
-            {"next_agent": "FINISHED", "reasoning": "All done"}
-        ]
-        
-        mock_manager.decide_next_agent.side_effect = decision_sequence
-        MockAgentManager.return_value = mock_manager
-        
-        yield mock_manager
+    _manager_template.reset_mock()
+    mock_manager = _manager_template.return_value
+    mock_manager.reset_mock(return_value=True, side_effect=True)
+    mock_manager.decide_next_agent.side_effect = list(DECISION_SEQUENCE)
+    monkeypatch.setattr('main.AgentManager', _manager_template)
+    return mock_manager
+
+
+# Agent classes replaced by mock_all_agents
+AGENT_NAMES = [
+    'LanguageSelector',
+    'Planner',
+    'FrontendCoder',
+    'BackendCoder',
+    'TerminalAgent',
+    'Tester',
+    'Debugger',
+    'DocumentationAgent'
+]
+
+# Result returned by every mocked agent run
+MOCK_SUCCESS = {
+    "success": True,
+    "output": {"data": "mocked"},
+    "error": None
+}
+
+
+@pytest.fixture(scope="module")
+def _agent_templates():
+    """Agent class mocks built once per module and reset per test."""
+    return {name: Mock(return_value=Mock()) for name in AGENT_NAMES}
 
 
 @pytest.fixture
-def mock_all_agents():
+def mock_all_agents(_agent_templates, monkeypatch):
     """Mock all agent classes to avoid real API calls."""
-    agents_to_mock = [
-        'main.LanguageSelector',
-        'main.Planner',
-        'main.FrontendCoder',
-        'main.BackendCoder',
-        'main.TerminalAgent',
-        'main.Tester',
-        'main.Debugger',
-        'main.DocumentationAgent'
-    ]
-    
-    patches = []
     mocks = {}
-    
-    for agent_path in agents_to_mock:
-        patcher = patch(agent_path)
-        mock_class = patcher.start()
-        
-        # Mock instance and run method
-        mock_instance = Mock()
-        mock_instance.run.return_value = {
-            "success": True,
-            "output": {"data": "mocked"},
-            "error": None
-        }
-        mock_class.return_value = mock_instance
-        
-        mocks[agent_path.split('.')[-1]] = mock_instance
-        patches.append(patcher)
-    
-    yield mocks
-    
-    # Stop all patches
-    for patcher in patches:
-        patcher.stop()
+    for name, mock_class in _agent_templates.items():
+        # Clear call history and anything a previous test configured
+        mock_class.reset_mock()
+        mock_instance = mock_class.return_value
+        mock_instance.reset_mock(return_value=True, side_effect=True)
+        mock_instance.run.return_value = MOCK_SUCCESS
+        monkeypatch.setattr(f'main.{name}', mock_class)
+        mocks[name] = mock_instance
+    return mocks
+
+
+@pytest.fixture(scope="class")
+def shared_builder():
+    """One MultiAgentBuilder per class, for tests that only read from it."""
+    return MultiAgentBuilder()
 
 
 class TestMultiAgentBuilder:
     """Test the MultiAgentBuilder orchestrator."""
     
-    def test_initialization(self):
+    def test_initialization(self, shared_builder):
         """Test MultiAgentBuilder initializes correctly."""
-        builder = MultiAgentBuilder()
+        builder = shared_builder
         
         assert builder.project_name == ""
         assert builder.project_path == ""
@@ -94,23 +108,20 @@ class TestMultiAgentBuilder:
         assert builder.max_errors > 0
         assert isinstance(builder.state, dict)
     
-    def test_sanitize_project_name(self):
+    @pytest.mark.parametrize("prompt, expected", [
+        ("Build a TODO App!", "build_a_todo_app"),
+        ("", "my_project")
+    ])
+    def test_sanitize_project_name(self, shared_builder, prompt, expected):
         """Test project name sanitization."""
-        builder = MultiAgentBuilder()
-        
-        # Test normal case
-        name1 = builder._sanitize_project_name("Build a TODO App!")
-        assert name1 == "build_a_todo_app"
-        
-        # Test special characters removal
-        name2 = builder._sanitize_project_name("API @#$ Service")
-        assert "@" not in name2
-        assert "#" not in name2
-        assert "$" not in name2
-        
-        # Test empty string
-        name3 = builder._sanitize_project_name("")
-        assert name3 == "my_project"
+        assert shared_builder._sanitize_project_name(prompt) == expected
+    
+    def test_sanitize_removes_special_characters(self, shared_builder):
+        """Test special characters are removed from the project name."""
+        name = shared_builder._sanitize_project_name("API @#$ Service")
+        assert "@" not in name
+        assert "#" not in name
+        assert "$" not in name
     
     def test_get_project_context(self):
         """Test context building."""
@@ -131,6 +142,49 @@ class TestMultiAgentBuilder:
         assert context["last_action"] == "LanguageSelector"
         assert context["loop_counter"] == 5
     
+    def test_pending_plan_steps_by_agent(self):
+        """Test plan steps are split between coders and not handed out twice."""
+        builder = MultiAgentBuilder()
+        builder.state["plan"] = [
+            {"step_id": 1, "description": "page", "files": ["index.html"]},
+            {"step_id": 2, "description": "api", "files": ["app.py"]},
+            {"step_id": 3, "description": "styles", "files": ["style.css"]},
+            {"step_id": 4, "description": "script", "files": ["app.js"]},
+        ]
+        
+        frontend = builder._pending_plan_steps("FrontendCoder")
+        assert [step["step_id"] for step in frontend] == [1, 3, 4]
+        assert [step["step_id"] for step in builder._pending_plan_steps("BackendCoder")] == [2]
+        
+        # Completed steps are not handed out again
+        builder._mark_steps_done("FrontendCoder", frontend[:2], {"success": True})
+        assert [step["step_id"] for step in builder._pending_plan_steps("FrontendCoder")] == [4]
+    
+    def test_every_plan_step_is_dispatched_in_batches(self):
+        """Test a plan larger than plan_batch_size is run batch by batch to the end."""
+        builder = MultiAgentBuilder()
+        builder.project_path = "/test/path"
+        builder.plan_batch_size = 2
+        builder.state["plan"] = [
+            {"step_id": i, "description": f"module {i}", "files": [f"mod{i}.py"]} for i in range(1, 6)
+        ]
+        coder = Mock()
+        coder.run.side_effect = lambda task, path, context, steps: {
+            "success": True,
+            "output": {"files": [step["files"][0] for step in steps]},
+            "error": None
+        }
+        builder._agents["BackendCoder"] = coder
+        
+        result = builder._execute_agent("BackendCoder", "Build app")
+        
+        batches = [[step["step_id"] for step in c.args[3]] for c in coder.run.call_args_list]
+        assert batches == [[1, 2], [3, 4], [5]]
+        assert result["success"] is True
+        assert result["output"]["files"] == [f"mod{i}.py" for i in range(1, 6)]
+        assert builder._pending_plan_steps("BackendCoder") == []
+    
+    @pytest.mark.integration
     @patch('os.chdir')
     @patch('os.makedirs')
     def test_start_creates_project_folder(self, mock_makedirs, mock_chdir, 
@@ -146,6 +200,7 @@ class TestMultiAgentBuilder:
         assert builder.project_name != ""
         assert "project" in builder.project_path
     
+    @pytest.mark.integration
     @patch('os.chdir')
     @patch('os.makedirs')
     def test_start_completes_without_exception(self, mock_makedirs, mock_chdir,
@@ -163,6 +218,7 @@ class TestMultiAgentBuilder:
         
         assert success is True
     
+    @pytest.mark.integration
     @patch('os.chdir')
     @patch('os.makedirs')
     def test_agent_loop_stops_at_finished(self, mock_makedirs, mock_chdir,
@@ -174,36 +230,32 @@ class TestMultiAgentBuilder:
         # Should have stopped at FINISHED, not hit max loops
         assert builder.loop_counter < builder.max_loops
     
+    @pytest.mark.integration
     @patch('os.chdir')
     @patch('os.makedirs')
-    def test_error_counting(self, mock_makedirs, mock_chdir):
+    def test_error_counting(self, mock_makedirs, mock_chdir,
+                            mock_agent_manager, mock_all_agents):
         """Test that error counting works correctly."""
-        with patch('main.AgentManager') as MockAgentManager:
-            mock_manager = Mock()
-            
-            # Simulate errors until max_errors
-            mock_manager.decide_next_agent.return_value = {
-                "next_agent": "LanguageSelector",
-                "reasoning": "Test"
-            }
-            MockAgentManager.return_value = mock_manager
-            
-            # Mock LanguageSelector to always fail
-            with patch('main.LanguageSelector') as MockLangSel:
-                mock_instance = Mock()
-                mock_instance.run.return_value = {
-                    "success": False,
-                    "output": {},
-                    "error": "Test error"
-                }
-                MockLangSel.return_value = mock_instance
-                
-                builder = MultiAgentBuilder()
-                builder.max_errors = 3
-                builder.start("Test app")
-                
-                # Should have stopped after 3 errors
-                assert builder.error_count >= builder.max_errors
+        # Simulate errors until max_errors
+        mock_agent_manager.decide_next_agent.side_effect = None
+        mock_agent_manager.decide_next_agent.return_value = {
+            "next_agent": "LanguageSelector",
+            "reasoning": "Test"
+        }
+        
+        # LanguageSelector always fails; the Debugger stays mocked
+        mock_all_agents["LanguageSelector"].run.return_value = {
+            "success": False,
+            "output": {},
+            "error": "Test error"
+        }
+        
+        builder = MultiAgentBuilder()
+        builder.max_errors = 3
+        builder.start("Test app")
+        
+        # Should have stopped after 3 errors
+        assert builder.error_count >= builder.max_errors
     
     def test_execute_agent_routes_correctly(self, mock_all_agents):
         """Test that _execute_agent routes to correct agent."""
@@ -230,17 +282,103 @@ class TestMultiAgentBuilder:
             assert "output" in result
             assert "error" in result
     
-    def test_execute_agent_handles_unknown_agent(self):
-        """Test handling of unknown agent name."""
+    def test_execute_agent_reuses_instances(self):
+        """Test that each agent is created once and reused."""
         builder = MultiAgentBuilder()
         builder.project_path = "/test/path"
         
-        result = builder._execute_agent("UnknownAgent", "Test task")
+        MockDebugger = Mock()
+        MockDebugger.return_value.run.return_value = MOCK_SUCCESS
+        builder._agent_factories["Debugger"] = MockDebugger
+        
+        builder._execute_agent("Debugger", "Task one")
+        builder._execute_agent("Debugger", "Task two")
+        
+        assert MockDebugger.call_count == 1
+        assert MockDebugger.return_value.run.call_count == 2
+    
+    def test_recurring_failure_skips_debugger(self):
+        """Test the same failure within two loops escalates without the Debugger."""
+        builder = MultiAgentBuilder()
+        failure = {"success": False, "output": {}, "error": "ImportError: flask"}
+        
+        with patch.object(builder, "_execute_agent", return_value=MOCK_SUCCESS) as mock_execute:
+            builder.loop_counter = 1
+            builder._handle_result("TerminalAgent", failure)
+            builder.loop_counter = 2
+            builder._handle_result("TerminalAgent", failure)
+        
+        assert mock_execute.call_count == 1
+        assert builder.error_count == 1
+    
+    def test_failed_background_write_is_reported(self):
+        """Test a failed background write is reported against the agent that queued it."""
+        builder = MultiAgentBuilder()
+        builder.pending_writes = [("Planner", Mock(result=Mock(return_value=False)))]
+        
+        assert builder._drain_pending_writes() == {"Planner": "Background file write failed"}
+        assert builder.pending_writes == []
+    
+    def test_unchanged_inputs_reuse_result(self):
+        """Test a reusable agent is skipped when only loop bookkeeping changed."""
+        builder = MultiAgentBuilder()
+        builder.project_path = "/test/path"
+        docs = Mock()
+        docs.run.return_value = {"success": True, "output": {"documentation": "# App"}, "error": None}
+        builder._agents["DocumentationAgent"] = docs
+        
+        first = builder._execute_agent("DocumentationAgent", "Write docs")
+        builder.loop_counter = 7
+        builder.state["completed_steps"].append("Tester")
+        second = builder._execute_agent("DocumentationAgent", "Write docs")
+        assert docs.run.call_count == 1
+        assert second["output"] == first["output"]
+        
+        # A failure upstream invalidates the reused result
+        builder._invalidate_outputs("Tester")
+        builder._execute_agent("DocumentationAgent", "Write docs")
+        assert docs.run.call_count == 2
+    
+    def test_code_change_drops_reused_results(self):
+        """Test a Debugger fix drops reused results, and Tester always re-runs."""
+        builder = MultiAgentBuilder()
+        builder.project_path = "/test/path"
+        docs = Mock()
+        docs.run.return_value = {"success": True, "output": {"documentation": "# App"}, "error": None}
+        tester = Mock()
+        tester.run.return_value = {"success": True, "output": {"report": "ok"}, "error": None}
+        debugger = Mock()
+        debugger.run.return_value = MOCK_SUCCESS
+        builder._agents.update(DocumentationAgent=docs, Tester=tester, Debugger=debugger)
+        
+        builder._execute_agent("Tester", "Test app")
+        builder._execute_agent("Tester", "Test app")
+        assert tester.run.call_count == 2
+        
+        builder._execute_agent("DocumentationAgent", "Write docs")
+        builder._execute_agent("Debugger", "Fix error")
+        builder._execute_agent("DocumentationAgent", "Write docs")
+        assert docs.run.call_count == 2
+    
+    def test_reused_result_does_not_duplicate_files(self):
+        """Test handling the same coder result twice records each file once."""
+        builder = MultiAgentBuilder()
+        result = {"success": True, "output": {"files": ["app.py", "models.py"]}, "error": None}
+        
+        builder._handle_result("BackendCoder", result)
+        builder._handle_result("BackendCoder", result)
+        
+        assert builder.state["generated_files"] == ["app.py", "models.py"]
+    
+    def test_execute_agent_handles_unknown_agent(self, shared_builder):
+        """Test handling of unknown agent name."""
+        result = shared_builder._execute_agent("UnknownAgent", "Test task")
         
         assert result["success"] is False
         assert "Unknown agent" in result["error"]
 
 
+@pytest.mark.integration
 class TestSystemIntegration:
     """Integration tests for the complete system."""
     
@@ -249,12 +387,13 @@ class TestSystemIntegration:
     @patch('os.getcwd', return_value='/original/dir')
     def test_directory_handling(self, mock_getcwd, mock_makedirs, mock_chdir,
                                mock_agent_manager, mock_all_agents):
-        """Test that system changes and restores directories correctly."""
+        """Test that the project path is absolute and the CWD is left alone."""
         builder = MultiAgentBuilder()
         builder.start("Test app")
         
-        # Should have changed directory and returned
-        assert mock_chdir.call_count >= 2  # Change to project, change back
+        # Agents get the path explicitly; chdir would race between threads
+        assert mock_chdir.call_count == 0
+        assert builder.project_path == os.path.join('/original/dir', 'project', 'test_app')
     
     @patch('os.chdir')
     @patch('os.makedirs')
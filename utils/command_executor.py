@@ -1,7 +1,15 @@
+import os
+import asyncio
 import subprocess
 import logging
 from typing import List, Optional, Dict, Union
 
+# Default concurrency for execute_many; capped so installs don't exhaust processes
+MAX_PARALLEL = max(2, (os.cpu_count() or 1) * 3 // 4)
+
+# Per-command timeout in seconds
+TIMEOUT = 300
+
 def execute(command: Union[str, List[str]], cwd: Optional[str] = None) -> Dict[str, Union[bool, str, int]]:
     """
     Executes a command safely using subprocess.run.
@@ -21,15 +29,15 @@ def execute(command: Union[str, List[str]], cwd: Optional[str] = None) -> Dict[s
         result = subprocess.run(
             command,
             cwd=cwd,
-            capture_output=True,
-            text=True,
+            capture_output=True, # communicate() already drains both pipes in 32 KiB reads
             check=False, # We handle return codes manually
-            timeout=300 # 5 minute timeout
+            timeout=TIMEOUT
         )
+        # Decode once at the end; stray non-UTF-8 bytes must not fail the command
         return {
             "success": result.returncode == 0,
-            "stdout": result.stdout,
-            "stderr": result.stderr,
+            "stdout": result.stdout.decode(errors="replace"),
+            "stderr": result.stderr.decode(errors="replace"),
             "exit_code": result.returncode
         }
     except subprocess.TimeoutExpired:
@@ -48,3 +56,65 @@ def execute(command: Union[str, List[str]], cwd: Optional[str] = None) -> Dict[s
             "stderr": str(e),
             "exit_code": -1
         }
+
+async def execute_async(command: Union[str, List[str]], cwd: Optional[str] = None) -> Dict[str, Union[bool, str, int]]:
+    """
+    Asynchronous execute(): same arguments, timeout and result shape.
+    
+    Args:
+        command: Command as list of arguments or space-separated string.
+        cwd: Current working directory for the command.
+        
+    Returns:
+        Dict containing success status, stdout, stderr, and exit_code.
+    """
+    if isinstance(command, str):
+        command = command.split()
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            cwd=cwd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+    except Exception as e:
+        logging.error(f"Error executing command {command}: {e}")
+        return {"success": False, "stdout": "", "stderr": str(e), "exit_code": -1}
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=TIMEOUT)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        logging.error(f"Command timed out: {command}")
+        return {"success": False, "stdout": "", "stderr": "Command timed out", "exit_code": -1}
+    return {
+        "success": proc.returncode == 0,
+        "stdout": stdout.decode(errors="replace"),
+        "stderr": stderr.decode(errors="replace"),
+        "exit_code": proc.returncode
+    }
+
+def execute_many(commands: List[Union[str, List[str]]], cwd: Optional[str] = None,
+                 max_parallel: int = MAX_PARALLEL) -> List[Dict[str, Union[bool, str, int]]]:
+    """
+    Runs independent commands concurrently, at most max_parallel at a time.
+    Only for commands that don't depend on each other's output or side effects.
+    
+    Args:
+        commands: Commands, each as accepted by execute().
+        cwd: Working directory shared by all commands.
+        max_parallel: Maximum number of commands running at once.
+        
+    Returns:
+        List of execute()-style result dicts, in input order.
+    """
+    async def _run_all():
+        sem = asyncio.Semaphore(max_parallel)
+        
+        async def _run_one(command):
+            async with sem:
+                return await execute_async(command, cwd)
+        
+        return await asyncio.gather(*[_run_one(command) for command in commands])
+    
+    return asyncio.run(_run_all())
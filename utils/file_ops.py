@@ -1,11 +1,18 @@
 import os
+import atexit
 import logging
 import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import Optional
 
 # MCP client integration (optional)
 _mcp_client = None
 
+# Background writer for write_file_async (one worker keeps writes in order)
+_write_behind = ThreadPoolExecutor(max_workers=1)
+
 def set_mcp_client(client):
     """Set the MCP client for file operations (optional)."""
     global _mcp_client
@@ -13,24 +20,75 @@ def set_mcp_client(client):
     if client:
         logging.info("file_ops: MCP client registered")
 
+# Persistent event loop for MCP calls, started on first use
+_loop = None
+_loop_lock = threading.Lock()
+
+# Seconds to wait for an MCP call before falling back to native I/O
+_MCP_TIMEOUT = 60
+
+# Single reads/writes below this size skip MCP: one native syscall is cheaper
+# than an async round trip
+_SMALL_OP_BYTES = 4096
+
+# Flags for native writes (binary on Windows, so no newline translation)
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+
+# read_file LRU cache: path -> (mtime_ns, size, content). Entries are only
+# served while the file's stat still matches; files above the size cap are
+# never cached
+_READ_CACHE_MAX = 64
+_READ_CACHE_BYTES = 64 * 1024
+_read_cache = OrderedDict()
+_read_cache_lock = threading.Lock()
+
+def invalidate_cache(path: Optional[str] = None) -> None:
+    """
+    Drops cached read_file contents for path, or all of them.
+    The write helpers in this module call it themselves.
+    """
+    with _read_cache_lock:
+        if path is None:
+            _read_cache.clear()
+        else:
+            _read_cache.pop(path, None)
+
+def _stop_loop():
+    _loop.call_soon_threadsafe(_loop.stop)
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Returns the background loop, starting its daemon thread if needed."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="file_ops-mcp", daemon=True).start()
+            _loop = loop
+            atexit.register(_stop_loop)
+    return _loop
+
 def _run_async(coro):
-    """Helper to run async operations in sync context."""
+    """Helper to run async operations in sync context (on the shared background loop)."""
+    future = asyncio.run_coroutine_threadsafe(coro, _get_loop())
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            # If event loop is running, we can't use it directly
-            return asyncio.run_coroutine_threadsafe(coro, loop).result()
-        else:
-            return loop.run_until_complete(coro)
-    except RuntimeError:
-        # No event loop, create a new one
-        return asyncio.run(coro)
+        return future.result(timeout=_MCP_TIMEOUT)
+    except FutureTimeoutError:
+        # Cancel before the caller falls back to native I/O, so a late MCP
+        # write can't land over newer content
+        future.cancel()
+        raise
 
-def write_file(filepath: str, content: str) -> bool:
-    """Writes content to a file, creating directories if necessary."""
+def write_file(filepath: str, content: str, force_mcp: bool = False) -> bool:
+    """
+    Writes content to a file, creating directories if necessary.
+    Small contents are written natively unless force_mcp is set.
+    """
+    
+    invalidate_cache(filepath)
     
     # Try MCP filesystem first if available
-    if _mcp_client and _mcp_client.is_available('filesystem'):
+    small = len(content) < _SMALL_OP_BYTES and not force_mcp
+    if not small and _mcp_client and _mcp_client.is_available('filesystem'):
         try:
             async def _mcp_write():
                 return await _mcp_client.call_tool(
@@ -40,28 +98,100 @@ def write_file(filepath: str, content: str) -> bool:
                     fallback_fn=None
                 )
             result = _run_async(_mcp_write())
-            logging.debug(f"Wrote {filepath} via MCP filesystem")
+            if logging.root.isEnabledFor(logging.DEBUG):
+                logging.debug(f"Wrote {filepath} via MCP filesystem")
             return True
         except Exception as e:
             logging.warning(f"MCP write failed for {filepath}, using native: {e}")
     
-    # Native fallback
+    return _write_native(filepath, content)
+
+# Directories already created by this process, so repeat writes into one
+# directory skip the makedirs stat
+_ensured_dirs = set()
+_ensured_dirs_lock = threading.Lock()
+
+def _ensure_dir(dirname: str, recheck: bool = False) -> None:
+    """
+    os.makedirs(dirname, exist_ok=True), skipped for directories already
+    ensured. recheck forces the makedirs, e.g. after the directory was removed.
+    """
+    if not dirname:
+        return
+    with _ensured_dirs_lock:
+        if dirname in _ensured_dirs and not recheck:
+            return
+    os.makedirs(dirname, exist_ok=True)
+    with _ensured_dirs_lock:
+        _ensured_dirs.add(dirname)
+
+def _write_native(filepath: str, content: str) -> bool:
+    """Native fallback for write_file."""
     try:
         dirname = os.path.dirname(filepath)
-        if dirname:
-            os.makedirs(dirname, exist_ok=True)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+        _ensure_dir(dirname)
+        # Encode once and write the raw fd; skips the TextIOWrapper layer
+        data = memoryview(content.encode('utf-8'))
+        try:
+            fd = os.open(filepath, _WRITE_FLAGS, 0o666)
+        except FileNotFoundError:
+            # The cached directory was removed since; create it again
+            if not dirname:
+                raise
+            _ensure_dir(dirname, recheck=True)
+            fd = os.open(filepath, _WRITE_FLAGS, 0o666)
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
         return True
     except Exception as e:
         logging.error(f"Error writing file {filepath}: {e}")
         return False
 
-def read_file(filepath: str) -> str:
-    """Reads content from a file."""
+def write_file_async(filepath: str, content: str) -> Future:
+    """
+    Queues write_file on a background thread.
+    The returned Future resolves to write_file's bool result.
+    """
+    return _write_behind.submit(write_file, filepath, content)
+
+def read_file(filepath: str, force_mcp: bool = False) -> str:
+    """
+    Reads content from a file.
+    Small local files are read natively unless force_mcp is set.
+    Repeat reads of an unchanged file (same mtime and size) come from cache.
+    """
+    try:
+        st = os.stat(filepath)
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = None
+    
+    if stamp is not None:
+        with _read_cache_lock:
+            entry = _read_cache.get(filepath)
+            if entry is not None and entry[:2] == stamp:
+                _read_cache.move_to_end(filepath)
+                return entry[2]
+    
+    content = _read_uncached(filepath, stamp, force_mcp)
+    # "" for a non-empty file is a failed read; don't pin it in the cache
+    if stamp is not None and stamp[1] <= _READ_CACHE_BYTES and (content or not stamp[1]):
+        with _read_cache_lock:
+            _read_cache[filepath] = (*stamp, content)
+            _read_cache.move_to_end(filepath)
+            if len(_read_cache) > _READ_CACHE_MAX:
+                _read_cache.popitem(last=False)
+    return content
+
+def _read_uncached(filepath: str, stamp: Optional[tuple], force_mcp: bool) -> str:
+    """read_file without the cache: MCP for large files (or force_mcp), else native."""
+    small = stamp is not None and stamp[1] < _SMALL_OP_BYTES
     
     # Try MCP filesystem first if available
-    if _mcp_client and _mcp_client.is_available('filesystem'):
+    if _mcp_client and _mcp_client.is_available('filesystem') and (force_mcp or not small):
         try:
             async def _mcp_read():
                 return await _mcp_client.call_tool(
@@ -71,12 +201,16 @@ def read_file(filepath: str) -> str:
                     fallback_fn=None
                 )
             content = _run_async(_mcp_read())
-            logging.debug(f"Read {filepath} via MCP filesystem")
+            if logging.root.isEnabledFor(logging.DEBUG):
+                logging.debug(f"Read {filepath} via MCP filesystem")
             return content
         except Exception as e:
             logging.warning(f"MCP read failed for {filepath}, using native: {e}")
     
-    # Native fallback
+    return _read_native(filepath)
+
+def _read_native(filepath: str) -> str:
+    """Native fallback for read_file."""
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
             return f.read()
@@ -87,24 +221,53 @@ def read_file(filepath: str) -> str:
 def list_files(directory: str) -> list[str]:
     """Lists files in a directory."""
     try:
-        if not os.path.exists(directory):
-            return []
-        return [f for f in os.listdir(directory) if os.path.isfile(os.path.join(directory, f))]
+        # A missing directory is an empty listing; no separate exists() stat.
+        # scandir entries carry the file type, so is_file() rarely needs a stat
+        with os.scandir(directory) as entries:
+            return [entry.name for entry in entries if entry.is_file()]
+    except FileNotFoundError:
+        return []
     except Exception as e:
         logging.error(f"Error listing files in {directory}: {e}")
         return []
 
 def file_exists(filepath: str) -> bool:
     """Checks if a file exists."""
-    return os.path.exists(filepath) and os.path.isfile(filepath)
+    # isfile() is False for missing paths, so no separate exists() stat
+    return os.path.isfile(filepath)
 
-def append_to_knowledge_base(filename: str, content: str) -> None:
-    """Appends content to a file in the agency_kb directory."""
-    kb_dir = "agency_kb"
+# Knowledge base append handles, kept open per absolute path (closed at exit)
+_kb_handles = {}
+_kb_lock = threading.Lock()
+
+def _close_kb_handles():
+    with _kb_lock:
+        for handle in _kb_handles.values():
+            handle.close()
+        _kb_handles.clear()
+
+atexit.register(_close_kb_handles)
+
+def append_to_knowledge_base(filename: str, content: str, base_dir: str = "") -> None:
+    """Appends content to a file in the agency_kb directory under base_dir (default: CWD)."""
+    kb_dir = os.path.join(base_dir, "agency_kb")
     filepath = os.path.join(kb_dir, filename)
-    try:
-        os.makedirs(kb_dir, exist_ok=True)
-        with open(filepath, 'a', encoding='utf-8') as f:
-            f.write(content + "\n")
-    except Exception as e:
-        logging.error(f"Error appending to knowledge base {filepath}: {e}")
+    key = os.path.abspath(filepath)
+    with _kb_lock:
+        try:
+            handle = _kb_handles.get(key)
+            if handle is None:
+                os.makedirs(kb_dir, exist_ok=True)
+                handle = _kb_handles[key] = open(key, 'a', encoding='utf-8')
+            handle.write(content + "\n")
+            # One write syscall per entry; readers see it immediately
+            handle.flush()
+        except Exception as e:
+            # Reopen on the next call rather than reuse a broken handle
+            broken = _kb_handles.pop(key, None)
+            if broken is not None:
+                try:
+                    broken.close()
+                except OSError:
+                    pass
+            logging.error(f"Error appending to knowledge base {filepath}: {e}")
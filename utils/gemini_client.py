@@ -7,11 +7,25 @@ This module supports switching between Google Gemini and Local Ollama using the
 """
 
 import os
+import re
 import json
 import time
+import random
+import functools
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
+from typing import Iterator
 from dotenv import load_dotenv
 
+# orjson parses LLM output several times faster; stdlib json is the fallback
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 load_dotenv()
 
 try:
@@ -24,40 +38,85 @@ except Exception:
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini").lower()
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "codegemma:7b")
+# Successful responses kept for identical requests (0 disables)
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "256"))
+# Sampled (temperature > 0) requests bypass the cache unless enabled, since
+# a retry with the same prompt may be after a different answer
+LLM_CACHE_SAMPLED = os.getenv("LLM_CACHE_SAMPLED", "false").lower() == "true"
+# Pooled Ollama connections
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
 
-# Provider Initialization
-if LLM_PROVIDER == "gemini":
-    import google.generativeai as genai
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    if not GEMINI_API_KEY:
-        raise ValueError("GEMINI_API_KEY not found in environment variables.")
-    genai.configure(api_key=GEMINI_API_KEY)
+# Provider SDKs, imported and configured by _ensure_provider() on first use
+# so importing this module (e.g. for extract_json) stays cheap
+genai = None
+ollama = None
+httpx = None
+_gemini_model = None
+_ollama_client = None
+_provider_ready = False
+_provider_lock = threading.Lock()
 
-elif LLM_PROVIDER == "ollama":
-    import ollama
-else:
+if LLM_PROVIDER not in ("gemini", "ollama"):
     logger.warning(f"Unknown LLM_PROVIDER: {LLM_PROVIDER}. Defaulting to 'gemini' behavior if possible, or failing.")
 
-def _generate_gemini(prompt: str, temperature: float, max_tokens: int) -> str:
-    """Helper to generate text using Gemini."""
-    model = genai.GenerativeModel(GEMINI_MODEL)
-    generation_config = genai.GenerationConfig(
+def _ensure_provider() -> None:
+    """Import and configure the provider SDK once, before the first request."""
+    global genai, ollama, httpx, _gemini_model, _ollama_client, _provider_ready
+    if _provider_ready:
+        return
+    with _provider_lock:
+        if _provider_ready:
+            return
+        if LLM_PROVIDER == "gemini":
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY not found in environment variables.")
+            import google.generativeai as _genai
+            _genai.configure(api_key=api_key)
+            genai = _genai
+            # Shared by sync and streaming calls; the model object keeps no per-request state
+            _gemini_model = genai.GenerativeModel(GEMINI_MODEL)
+        elif LLM_PROVIDER == "ollama":
+            import httpx as _httpx
+            import ollama as _ollama
+            httpx, ollama = _httpx, _ollama
+            # Client for generate/generate_stream; its pool is sized so parallel
+            # agents keep their connections alive
+            _ollama_client = ollama.Client(
+                limits=httpx.Limits(max_connections=LLM_MAX_CONCURRENCY, max_keepalive_connections=LLM_MAX_CONCURRENCY)
+            )
+        else:
+            _unsupported_provider()
+        _provider_ready = True
+
+@functools.lru_cache(maxsize=32)
+def _gemini_config(temperature: float, max_tokens: int):
+    """GenerationConfig per (temperature, max_tokens); callers use a handful of pairs."""
+    return genai.GenerationConfig(
         temperature=temperature,
         max_output_tokens=max_tokens
     )
-    response = model.generate_content(prompt, generation_config=generation_config)
+
+@functools.lru_cache(maxsize=32)
+def _ollama_options(temperature: float, max_tokens: int) -> dict:
+    """Ollama options per (temperature, max_tokens); read-only once built."""
+    return {
+        "temperature": temperature,
+        "num_predict": max_tokens
+    }
+
+def _generate_gemini(prompt: str, temperature: float, max_tokens: int) -> str:
+    """Helper to generate text using Gemini."""
+    response = _gemini_model.generate_content(prompt, generation_config=_gemini_config(temperature, max_tokens))
     return response.text
 
 def _generate_ollama(prompt: str, temperature: float, max_tokens: int) -> str:
     """Helper to generate text using Ollama."""
-    response = ollama.generate(
+    response = _ollama_client.generate(
         model=OLLAMA_MODEL,
         prompt=prompt,
         stream=False,
-        options={
-            "temperature": temperature,
-            "num_predict": max_tokens
-        }
+        options=_ollama_options(temperature, max_tokens)
     )
     return response["response"]
 
@@ -73,14 +132,62 @@ def generate(prompt: str, temperature: float = 0.4, max_tokens: int = 4096) -> s
     Returns:
         The generated text.
     """
-    logger.info(f"Generating with {LLM_PROVIDER} (Model: {GEMINI_MODEL if LLM_PROVIDER == 'gemini' else OLLAMA_MODEL})")
+    logger.info(f"Generating with {LLM_PROVIDER} (Model: {_MODEL_NAME})")
     
-    if LLM_PROVIDER == "gemini":
-        return _generate_gemini(prompt, temperature, max_tokens)
-    elif LLM_PROVIDER == "ollama":
-        return _generate_ollama(prompt, temperature, max_tokens)
-    else:
-        raise ValueError(f"Unsupported LLM_PROVIDER: {LLM_PROVIDER}")
+    _ensure_provider()
+    return _GENERATE_FN(prompt, temperature, max_tokens)
+
+def _stream_gemini(prompt: str, temperature: float, max_tokens: int) -> Iterator[str]:
+    """Helper to stream text chunks from Gemini."""
+    for chunk in _gemini_model.generate_content(prompt, generation_config=_gemini_config(temperature, max_tokens), stream=True):
+        # The final chunk may carry only the finish reason
+        if chunk.parts:
+            yield chunk.text
+
+def _stream_ollama(prompt: str, temperature: float, max_tokens: int) -> Iterator[str]:
+    """Helper to stream text chunks from Ollama."""
+    for part in _ollama_client.generate(
+        model=OLLAMA_MODEL,
+        prompt=prompt,
+        stream=True,
+        options=_ollama_options(temperature, max_tokens)
+    ):
+        yield part["response"]
+
+def generate_stream(prompt: str, temperature: float = 0.4, max_tokens: int = 4096) -> Iterator[str]:
+    """
+    Streaming counterpart of generate(): yields text as the model produces it,
+    so long outputs can be processed before the response is complete.
+    
+    Args:
+        prompt: The input prompt.
+        temperature: Controls randomness (0.0 to 1.0).
+        max_tokens: Maximum number of tokens to generate.
+        
+    Yields:
+        Chunks of the generated text.
+    """
+    logger.info(f"Generating with {LLM_PROVIDER} (Model: {_MODEL_NAME}, streaming)")
+    
+    _ensure_provider()
+    yield from _STREAM_FN(prompt, temperature, max_tokens)
+
+def _unsupported_provider(*args, **kwargs):
+    raise ValueError(f"Unsupported LLM_PROVIDER: {LLM_PROVIDER}")
+
+# Provider implementations, picked once since LLM_PROVIDER is fixed at import
+if LLM_PROVIDER == "gemini":
+    _GENERATE_FN, _STREAM_FN = _generate_gemini, _stream_gemini
+    _MODEL_NAME = GEMINI_MODEL
+elif LLM_PROVIDER == "ollama":
+    _GENERATE_FN, _STREAM_FN = _generate_ollama, _stream_ollama
+    _MODEL_NAME = OLLAMA_MODEL
+else:
+    _GENERATE_FN, _STREAM_FN = _unsupported_provider, _unsupported_provider
+    _MODEL_NAME = OLLAMA_MODEL
+
+# Contents of each ``` fenced block (fences may be indented, info string optional)
+_FENCED_RE = re.compile(r"^[ \t]*```[^\n]*\n(.*?)^[ \t]*```", re.MULTILINE | re.DOTALL)
 
 def extract_json(text: str) -> dict:
     """
@@ -95,58 +202,126 @@ def extract_json(text: str) -> dict:
     """
     try:
         # 1. Try direct parsing first
-        return json.loads(text)
-    except json.JSONDecodeError:
+        return _json_loads(text)
+    except ValueError:
         pass
 
-    # 2. Try removing markdown code blocks
-    clean_text = text
-    if "```" in text:
-        # Remove ```json, ```python, etc.
-        lines = text.splitlines()
-        new_lines = []
-        in_block = False
-        for line in lines:
-            if line.strip().startswith("```"):
-                in_block = not in_block
-                continue
-            if in_block:
-                new_lines.append(line)
-        
-        # If we extracted something from blocks, try parsing that
-        if new_lines:
-            block_text = "\n".join(new_lines).strip()
-            try:
-                return json.loads(block_text)
-            except json.JSONDecodeError:
-                pass
+    # 2. Try each markdown code block (```json, ```python, etc.)
+    for match in _FENCED_RE.finditer(text):
+        try:
+            return _json_loads(match.group(1))
+        except ValueError:
+            pass
     
     # 3. Brute force: Find the first '{' and last '}'
-    try:
-        start_idx = text.find('{')
-        end_idx = text.rfind('}')
-        if start_idx != -1 and end_idx != -1:
-            json_str = text[start_idx : end_idx + 1]
-            return json.loads(json_str)
-    except json.JSONDecodeError:
-        pass
+    start_idx = text.find('{')
+    end_idx = text.rfind('}')
+    if start_idx != -1 and end_idx > start_idx:
+        json_str = text[start_idx : end_idx + 1]
+        try:
+            return _json_loads(json_str)
+        except ValueError:
+            pass
 
-    # 4. Fallback: Try to fix common issues (like single quotes)
-    try:
-        if start_idx != -1 and end_idx != -1:
-            json_str = text[start_idx : end_idx + 1]
-            # Replace single quotes with double quotes (risky but sometimes necessary for bad LLM output)
-            fixed_str = json_str.replace("'", '"') 
-            return json.loads(fixed_str)
-    except Exception:
-        pass
+        # 4. Fallback: Replace single quotes with double quotes (risky but sometimes necessary for bad LLM output)
+        try:
+            return _json_loads(json_str.replace("'", '"'))
+        except ValueError:
+            pass
 
     logger.error(f"Failed to extract JSON from text: {text[:100]}...")
     raise ValueError("No JSON object found in text.")
 
+# Characters that change JSON nesting or string state
+_JSON_TOKEN_RE = re.compile(r'[{}"\\]')
+
+def take_json_object(chunks: Iterator[str]) -> str:
+    """
+    Joins streamed chunks, stopping as soon as the first top-level JSON
+    object is complete so the rest of the generation is not waited for.
+    
+    Args:
+        chunks: Text chunks, e.g. from generate_stream_with_retry.
+        
+    Returns:
+        The text up to the object's closing brace, or all of it if no
+        object completes.
+    """
+    text = ""
+    pos = 0
+    depth = 0
+    in_string = False
+    escaped_at = -1
+    for chunk in chunks:
+        text += chunk
+        for match in _JSON_TOKEN_RE.finditer(text, pos):
+            i = match.start()
+            char = match.group()
+            if i == escaped_at:
+                continue
+            if in_string:
+                if char == "\\":
+                    escaped_at = i + 1
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                # Quotes in prose before the object are not strings
+                in_string = depth > 0
+            elif char == "{":
+                depth += 1
+            elif char == "}" and depth > 0:
+                depth -= 1
+                if depth == 0:
+                    close = getattr(chunks, "close", None)
+                    if close is not None:
+                        close()
+                    return text[:i + 1]
+        pos = len(text)
+    return text
+
+# LRU of (provider, prompt digest, generate kwargs) → response text
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+def _cache_key(prompt: str, kwargs: dict):
+    """
+    Key a request by provider, prompt hash and generation settings.
+    Returns None when the request should not be cached.
+    """
+    if LLM_CACHE_SIZE <= 0:
+        return None
+    if kwargs.get("temperature", 0.4) > 0 and not LLM_CACHE_SAMPLED:
+        return None
+    digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+    return (LLM_PROVIDER, digest, tuple(sorted(kwargs.items())))
+
+def _cache_get(key: tuple):
+    with _response_cache_lock:
+        response = _response_cache.get(key)
+        if response is not None:
+            _response_cache.move_to_end(key)
+        return response
+
+def _cache_put(key: tuple, response: str) -> None:
+    with _response_cache_lock:
+        _response_cache[key] = response
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > LLM_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+
+def _backoff(attempt: int) -> float:
+    """
+    Exponential backoff with full jitter: a random delay up to 2^(attempt-1)s,
+    so callers that failed together don't all retry at the same moment.
+    """
+    return random.uniform(0, 2 ** (attempt - 1))
+
 def generate_with_retry(prompt: str, max_retries: int = 3, **kwargs) -> str:
     """
     Generates text with retry logic for rate limits and errors.
+    Identical requests (same prompt and settings) are answered from an
+    in-process LRU cache, so repeated Strike-3 loops skip the API; sampled
+    requests only when LLM_CACHE_SAMPLED is set.
     
     Args:
         prompt: The input prompt.
@@ -156,13 +331,65 @@ def generate_with_retry(prompt: str, max_retries: int = 3, **kwargs) -> str:
     Returns:
         The generated text.
     """
+    key = _cache_key(prompt, kwargs)
+    if key is not None:
+        cached = _cache_get(key)
+        if cached is not None:
+            logger.info("Using cached LLM response")
+            return cached
+    
+    # Configuration errors won't go away on retry
+    _ensure_provider()
     for attempt in range(1, max_retries + 1):
         try:
-            return generate(prompt, **kwargs)
+            response = generate(prompt, **kwargs)
+            if key is not None:
+                _cache_put(key, response)
+            return response
         except Exception as e:
             logger.warning(f"Attempt {attempt} failed: {e}")
             if attempt < max_retries:
-                time.sleep(2 ** (attempt - 1)) # Exponential backoff
+                time.sleep(_backoff(attempt))
             else:
                 logger.error(f"All {max_retries} attempts failed.")
                 raise
+
+def generate_stream_with_retry(prompt: str, max_retries: int = 3, **kwargs) -> Iterator[str]:
+    """
+    Streaming counterpart of generate_with_retry, sharing its response cache.
+    A cached response is yielded as a single chunk. Only failures before the
+    first chunk are retried; once text has been yielded an error is raised.
+    
+    Args:
+        prompt: The input prompt.
+        max_retries: Number of retries.
+        **kwargs: Arguments passed to generate_stream.
+        
+    Yields:
+        Chunks of the generated text.
+    """
+    key = _cache_key(prompt, kwargs)
+    if key is not None:
+        cached = _cache_get(key)
+        if cached is not None:
+            logger.info("Using cached LLM response")
+            yield cached
+            return
+    
+    # Configuration errors won't go away on retry
+    _ensure_provider()
+    for attempt in range(1, max_retries + 1):
+        chunks = []
+        try:
+            for chunk in generate_stream(prompt, **kwargs):
+                chunks.append(chunk)
+                yield chunk
+            if key is not None:
+                _cache_put(key, "".join(chunks))
+            return
+        except Exception as e:
+            logger.warning(f"Attempt {attempt} failed: {e}")
+            if chunks or attempt >= max_retries:
+                logger.error(f"Streaming failed after {attempt} attempts.")
+                raise
+            time.sleep(_backoff(attempt))
@@ -1,6 +1,9 @@
 import logging
+import logging.handlers
 import os
 import sys
+import queue
+import atexit
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,15 +22,21 @@ def setup_logger():
 
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-    # File Handler
-    file_handler = logging.FileHandler("builder.log", encoding='utf-8')
+    # File Handler (builder.log is opened on the first record)
+    file_handler = logging.FileHandler("builder.log", encoding='utf-8', delay=True)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
 
     # Console Handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+
+    # Log calls only enqueue the record; a background thread does the disk and stdout writes
+    log_queue = queue.Queue(-1)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    # Drain the queue before exit so no trailing records are lost
+    atexit.register(listener.stop)
 
     return logger
 
@@ -93,7 +93,8 @@ class MCPClient:
         """
         if not self.is_available(server_name):
             if fallback_fn:
-                logger.debug(f"MCP '{server_name}' unavailable, using fallback")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"MCP '{server_name}' unavailable, using fallback")
                 return fallback_fn()
             raise Exception(f"MCP server '{server_name}' not available and no fallback provided")
         
@@ -103,7 +104,8 @@ class MCPClient:
             # result = await self.servers[server_name]['session'].call_tool(tool_name, params)
             # return result
             
-            logger.debug(f"MCP call: {server_name}.{tool_name}({params})")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"MCP call: {server_name}.{tool_name}({params})")
             
             # Since we don't have actual MCP servers, use fallback
             if fallback_fn:
@@ -127,7 +129,8 @@ class MCPClient:
                 # await self.servers[server_name]['session'].close()
                 self.servers.pop(server_name, None)
                 self.available_servers.discard(server_name)
-                logger.debug(f"Closed MCP server: {server_name}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Closed MCP server: {server_name}")
             except Exception as e:
                 logger.error(f"Error closing {server_name}: {e}")
         